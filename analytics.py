@@ -0,0 +1,82 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func
+from sqlmodel import Session, select
+
+from models import Category, CategoryMonthTotal, CategoryType, MonthlyBudget
+
+# Category types reported by the dashboard, in response order; "expenses" are every type but income.
+SUMMARY_TYPES = (CategoryType.INCOME, CategoryType.MONTHLY, CategoryType.CASH, CategoryType.SAVINGS)
+MAX_RANGE_MONTHS = 120
+# YYYY-MM with a year of 0001-9999 (no lookahead: pydantic's regex engine doesn't support it).
+MONTH_PATTERN = r"^(000[1-9]|00[1-9]\d|0[1-9]\d{2}|[1-9]\d{3})-(0[1-9]|1[0-2])$"
+
+
+def parse_month(value: str) -> Tuple[int, int]:
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def month_labels(start: Tuple[int, int], months: int) -> List[str]:
+    first = start[0] * 12 + start[1] - 1
+    return [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(first, first + months)]
+
+
+def cents(amount: Optional[Decimal]) -> int:
+    return int((amount or 0) * 100)
+
+
+def _in_range(table, start: Tuple[int, int], end: Tuple[int, int]):
+    # The year bound is the index-usable part of the predicate; the month arithmetic trims the edge years.
+    month_index = table.year * 12 + table.month
+    return and_(table.year.between(start[0], end[0]),
+                month_index.between(start[0] * 12 + start[1], end[0] * 12 + end[1]))
+
+
+def budget_vs_actual(session: Session, user_id: UUID, checking_id: UUID, start: Tuple[int, int], end: Tuple[int, int]) -> Dict[str, Any]:
+    """Budgeted vs. actual per category and per category type for every month from start to end (inclusive).
+
+    Three queries (categories, overrides, one grouped rollup read) fill category x month matrices of integer
+    cents; everything after that is exact array arithmetic, converted back to amounts once for the response.
+    """
+    import numpy as np  # only this endpoint needs it; keep it out of worker boot
+
+    months = (end[0] * 12 + end[1]) - (start[0] * 12 + start[1]) + 1
+    origin = start[0] * 12 + start[1]
+    categories = session.exec(select(Category.id, Category.name, Category.type, Category.budgeted_amount)
+                              .where(Category.user_id == user_id).order_by(Category.type, Category.name)).all()
+    position = {row.id: i for i, row in enumerate(categories)}
+
+    budgeted = np.repeat(np.array([cents(row.budgeted_amount) for row in categories], dtype=np.int64).reshape(-1, 1), months, axis=1)
+    overrides = [(position[cat_id], year * 12 + month - origin, cents(amount)) for cat_id, year, month, amount in session.exec(
+        select(MonthlyBudget.category_id, MonthlyBudget.year, MonthlyBudget.month, MonthlyBudget.budgeted_amount)
+        .where(MonthlyBudget.user_id == user_id, _in_range(MonthlyBudget, start, end))) if cat_id in position]
+    if overrides:
+        rows, cols, amounts = (np.array(column) for column in zip(*overrides))
+        budgeted[rows, cols] = amounts
+
+    actual = np.zeros((len(categories), months), dtype=np.int64)
+    totals = [(position[cat_id], year * 12 + month - origin, cents(amount)) for cat_id, year, month, amount in session.exec(
+        select(CategoryMonthTotal.category_id, CategoryMonthTotal.year, CategoryMonthTotal.month, func.sum(CategoryMonthTotal.abs_amount))
+        .where(CategoryMonthTotal.user_id == user_id, CategoryMonthTotal.account_id == checking_id, _in_range(CategoryMonthTotal, start, end))
+        .group_by(CategoryMonthTotal.category_id, CategoryMonthTotal.year, CategoryMonthTotal.month)) if cat_id in position]
+    if totals:
+        rows, cols, amounts = (np.array(column) for column in zip(*totals))
+        np.add.at(actual, (rows, cols), amounts)
+
+    # One-hot (type x category) matrix: a single matmul per measure yields every per-type monthly series.
+    type_codes = np.array([SUMMARY_TYPES.index(row.type) if row.type in SUMMARY_TYPES else -1 for row in categories], dtype=int)
+    membership = (np.arange(len(SUMMARY_TYPES)).reshape(-1, 1) == type_codes).astype(np.int64)
+    type_budgeted, type_actual = membership @ budgeted, membership @ actual
+    expenses_budgeted, expenses_actual = type_budgeted[1:].sum(axis=0), type_actual[1:].sum(axis=0)
+
+    def series(b, a): return {"budgeted": (b / 100).tolist(), "actual": (a / 100).tolist()}
+
+    summary = {t.value.lower(): series(type_budgeted[i], type_actual[i]) for i, t in enumerate(SUMMARY_TYPES)}
+    summary["total_expenses"] = series(expenses_budgeted, expenses_actual)
+    summary["net_cash_flow"] = series(type_budgeted[0] - expenses_budgeted, type_actual[0] - expenses_actual)
+    return {"months": month_labels(start, months), "summary": summary,
+            "categories": [{"id": row.id, "name": row.name, "type": row.type, **series(budgeted[i], actual[i])}
+                           for i, row in enumerate(categories)]}
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+
+from db import SessionRunner, get_session
+from models import Token, User
+
+SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-please-change")
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")))
+REFRESH_TOKEN_EXPIRE = timedelta(days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30")))
+# Upper bound on how long another worker may keep honouring a revoked token version.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so a small dedicated thread pool hashes in parallel without touching the request threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hash jobs running or queued beyond this are rejected with 429 instead of piling up behind each other.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+
+CREDENTIALS_ERROR = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials",
+                                  headers={"WWW-Authenticate": "Bearer"})
+
+
+# passlib and python-jose (with its crypto backends) are imported on first use rather than at worker boot;
+# together they are a large share of the app's import time.
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def verify_password(plain, hashed): return pwd_context().verify(plain, hashed)
+
+
+def get_password_hash(password): return pwd_context().hash(password)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many authentication requests, retry shortly",
+                                headers={"Retry-After": "1"})
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(verify_password, plain, hashed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: UUID
+    username: str
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, username=user.username, is_active=user.is_active, token_version=user.token_version)
+
+
+class UserCache:
+    # LRU of authenticated users with a TTL, so the common request path authorizes without a DB lookup.
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[CurrentUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry: return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user: CurrentUser):
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock: self._entries.pop(user_id, None)
+
+
+user_cache = UserCache()
+
+
+def _encode(user: User, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.now(timezone.utc)
+    claims = {"sub": str(user.id), "typ": token_type, "ver": user.token_version, "act": user.is_active, "iat": now,
+              "exp": now + expires_delta}
+    from jose import jwt
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def issue_tokens(user: User) -> Token:
+    return Token(access_token=_encode(user, "access", ACCESS_TOKEN_EXPIRE), refresh_token=_encode(user, "refresh", REFRESH_TOKEN_EXPIRE),
+                 expires_in=int(ACCESS_TOKEN_EXPIRE.total_seconds()))
+
+
+def decode_token(token: str, token_type: str) -> dict:
+    from jose import JWTError, jwt
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims["sub"] = UUID(claims.get("sub"))
+    except (JWTError, ValueError, TypeError):
+        raise CREDENTIALS_ERROR
+    if claims.get("typ") != token_type or not isinstance(claims.get("ver"), int) or not claims.get("act"): raise CREDENTIALS_ERROR
+    return claims
+
+
+def revoke_tokens(user: User):
+    # Bumping the version invalidates every access and refresh token issued so far. Callers evict the user from
+    # user_cache after committing; other workers pick the change up when their entry's TTL runs out.
+    user.token_version += 1
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme),
+                           session: SessionRunner = Depends(get_session)) -> CurrentUser:
+    claims = decode_token(token, "access")
+    user = user_cache.get(claims["sub"])
+    if user is None:
+        # The session only checks out a connection here, on a cache miss.
+        db_user = await session.run_sync(lambda s: s.get(User, claims["sub"]))
+        if not db_user: raise HTTPException(401, "User not found")
+        user = CurrentUser.from_user(db_user)
+        user_cache.put(user)
+    if not user.is_active or user.token_version != claims["ver"]: raise CREDENTIALS_ERROR
+    # ReadYourWritesMiddleware reads this back once a write request has been answered.
+    request.state.user_id = user.id
+    return user
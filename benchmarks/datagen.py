@@ -0,0 +1,155 @@
+"""Generate a synthetic, reproducible Tri-Sphere Budget dataset.
+
+    python benchmarks/datagen.py --database-url sqlite:///bench.sqlite --users 10 --months 36 --pending 200
+
+Each user gets Checking and Savings accounts, a realistic category set, `--months` months of transactions
+ending at `--end`, MonthlyBudget overrides for about a quarter of the category-months, and `--pending`
+imported-but-unreviewed statement rows. Rollups are rebuilt at the end. All values and ids derive from
+`--seed`. Every user's password is "bench-password".
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+import importer  # noqa: E402
+import rollups  # noqa: E402
+from auth import get_password_hash  # noqa: E402
+from models import (  # noqa: E402
+    Account, AccountType, Category, CategoryType, MonthlyBudget, PendingTransaction, Transaction, User
+)
+
+PASSWORD = "bench-password"
+CHUNK = 5000
+
+# (name, type, monthly budget, statement merchants, transactions per month)
+CATEGORIES = [
+    ("Salary", CategoryType.INCOME, 5200, ["ACME CORP PAYROLL"], 1),
+    ("Rent", CategoryType.MONTHLY, 1800, ["OAK STREET PROPERTY MGMT"], 1),
+    ("Utilities", CategoryType.MONTHLY, 180, ["CITY POWER & LIGHT", "METRO WATER", "FASTNET INTERNET"], 3),
+    ("Phone", CategoryType.MONTHLY, 60, ["MOBILECO WIRELESS"], 1),
+    ("Groceries", CategoryType.CASH, 650, ["FRESH MARKET #{n}", "SAVE MORE FOODS {n}", "CORNER GROCER"], 12),
+    ("Dining", CategoryType.CASH, 250, ["BLUE BOTTLE CAFE", "PIZZA PALACE {n}", "SUSHI GO", "TACO STAND"], 10),
+    ("Transport", CategoryType.CASH, 160, ["SHELL OIL {n}", "METRO TRANSIT", "RIDESHARE TRIP {n}"], 8),
+    ("Shopping", CategoryType.CASH, 200, ["AMAZON MKTP US*{n}", "TARGET STORE {n}", "HARDWARE DEPOT"], 5),
+    ("Entertainment", CategoryType.CASH, 80, ["STREAMFLIX", "CINEMA 8", "BOOK NOOK"], 3),
+    ("Emergency Fund", CategoryType.SAVINGS, 300, [], 0),
+    ("Vacation", CategoryType.SAVINGS, 150, [], 0),
+    ("Card Payment", CategoryType.TRANSFER, 0, ["CARD PAYMENT THANK YOU"], 1),
+]
+
+
+def month_sequence(end: Tuple[int, int], months: int) -> List[Tuple[int, int]]:
+    last = end[0] * 12 + end[1] - 1
+    return [(i // 12, i % 12 + 1) for i in range(last - months + 1, last + 1)]
+
+
+def money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+def _insert(session: Session, table, rows: List[Dict[str, Any]]):
+    for start in range(0, len(rows), CHUNK): session.execute(insert(table), rows[start:start + CHUNK])
+
+
+def generate(engine: Engine, users: int = 5, months: int = 36, pending: int = 200, end: Tuple[int, int] = (2025, 12),
+             seed: int = 42) -> Dict[str, Any]:
+    """Insert the dataset and describe it: per-user ids, the generated months and row counts."""
+    rng = random.Random(seed)
+
+    def new_id() -> UUID: return UUID(int=rng.getrandbits(128), version=4)
+
+    def merchant(pattern: str) -> str: return pattern.format(n=rng.randint(100, 9999))
+
+    SQLModel.metadata.create_all(engine)
+    hashed_password = get_password_hash(PASSWORD)
+    calendar = month_sequence(end, months)
+    counts = {"users": users, "transactions": 0, "monthly_budgets": 0, "pending_transactions": 0}
+    generated = []
+    with Session(engine) as session:
+        for n in range(users):
+            user_id, checking_id, savings_id = new_id(), new_id(), new_id()
+            username = f"bench{seed}-{n}"
+            session.execute(insert(User.__table__), [{"id": user_id, "username": username, "email": f"{username}@example.com",
+                                                       "hashed_password": hashed_password, "is_active": True, "token_version": 0}])
+            session.execute(insert(Account.__table__), [
+                {"id": checking_id, "user_id": user_id, "name": "Checking", "type": AccountType.CHECKING, "initial_balance": 0},
+                {"id": savings_id, "user_id": user_id, "name": "Savings", "type": AccountType.SAVINGS, "initial_balance": 0}])
+            categories = [(new_id(), *spec) for spec in CATEGORIES]
+            session.execute(insert(Category.__table__), [{"id": cat_id, "user_id": user_id, "name": name, "type": cat_type,
+                                                          "budgeted_amount": budget}
+                                                         for cat_id, name, cat_type, budget, _, _ in categories])
+
+            transactions, overrides = [], []
+            for year, month in calendar:
+                for cat_id, name, cat_type, budget, merchants, per_month in categories:
+                    if budget and rng.random() < 0.25:
+                        overrides.append({"id": new_id(), "user_id": user_id, "category_id": cat_id, "year": year, "month": month,
+                                          "budgeted_amount": money(budget * rng.uniform(0.8, 1.2))})
+                    if cat_type == CategoryType.SAVINGS:
+                        # Same shape as /transactions/fund-savings: a checking debit paired with a savings credit.
+                        for account_id, sign, description in ((checking_id, -1, "Budgeted Savings Funding"),
+                                                              (savings_id, 1, "Funding from Checking")):
+                            transactions.append((account_id, cat_id, sign * budget, date(year, month, 1), description))
+                        continue
+                    for _ in range(per_month):
+                        amount = money(max(budget, 40) / per_month * rng.uniform(0.5, 1.5))
+                        transactions.append((checking_id, cat_id, amount if cat_type == CategoryType.INCOME else -amount,
+                                             date(year, month, rng.randint(1, 28)), merchant(rng.choice(merchants))))
+            account_types = {checking_id: AccountType.CHECKING, savings_id: AccountType.SAVINGS}
+            _insert(session, Transaction.__table__, [
+                {"id": new_id(), "user_id": user_id, "account_id": account_id, "category_id": cat_id, "amount": amount,
+                 "description": description, "transaction_date": day,
+                 "fingerprint": importer.fingerprint(account_types[account_id], day, amount, description)}
+                for account_id, cat_id, amount, day, description in transactions])
+            _insert(session, MonthlyBudget.__table__, overrides)
+
+            year, month = calendar[-1]
+            statement = []
+            for _ in range(pending):
+                spec = rng.choice([c for c in CATEGORIES if c[3]])
+                description, day, amount = merchant(rng.choice(spec[3])), date(year, month, rng.randint(1, 28)), money(rng.uniform(2, 200))
+                statement.append({"id": new_id(), "user_id": user_id, "statement_description": description, "transaction_date": day,
+                                  "amount": -amount, "target_account_type": AccountType.CHECKING,
+                                  "fingerprint": importer.fingerprint(AccountType.CHECKING, day, amount, description),
+                                  "possible_duplicate": False})
+            _insert(session, PendingTransaction.__table__, statement)
+            session.commit()
+
+            counts["transactions"] += len(transactions)
+            counts["monthly_budgets"] += len(overrides)
+            counts["pending_transactions"] += len(statement)
+            generated.append({"username": username, "user_id": str(user_id), "checking_id": str(checking_id),
+                              "category_ids": [str(c[0]) for c in categories]})
+        rollups.rebuild(session)
+    return {"users": generated, "months": calendar, "counts": counts, "password": PASSWORD}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), required=not os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--months", type=int, default=36, help="Months of transaction history per user.")
+    parser.add_argument("--pending", type=int, default=200, help="Pending statement rows per user.")
+    parser.add_argument("--end", default="2025-12", help="Last month of history (YYYY-MM).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    data = generate(create_engine(args.database_url), args.users, args.months, args.pending,
+                    tuple(int(part) for part in args.end.split("-")), args.seed)
+    print(f"Generated {data['counts']} in {time.perf_counter() - start:.1f}s; users {', '.join(u['username'] for u in data['users'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare transactions insert throughput with random (uuid4) and time-ordered (uuid7) primary keys.
+
+    python benchmarks/id_inserts.py --rows 500000 --batch 500
+    python benchmarks/id_inserts.py --database-url "mysql+mysqlconnector://root:pw@localhost/bench_ids_{scheme}"
+
+Each scheme gets its own database (a temporary SQLite file, or `--database-url` with "{scheme}" filled in). Rows are
+inserted in `--batch`-row multi-row INSERTs, one commit each, like statement uploads and finalize; throughput is
+reported for every tenth of the run, so the slowdown of random keys as the table outgrows the buffer pool shows
+up in the later segments. On MySQL, size innodb_buffer_pool_size well below the table to see the effect.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, create_engine  # noqa: E402
+
+import datagen  # noqa: E402
+from migrations import create_database  # noqa: E402
+from models import Transaction, uuid7  # noqa: E402
+
+SCHEMES = {"uuid4": uuid4, "uuid7": uuid7}
+SEGMENTS = 10
+
+
+def run_scheme(args, scheme, database_url):
+    create_database(database_url)
+    engine = create_engine(database_url)
+    data = datagen.generate(engine, 1, 1, 0, seed=args.seed)
+    user = data["users"][0]
+    user_id, account_id, category_ids = UUID(user["user_id"]), UUID(user["checking_id"]), [UUID(c) for c in user["category_ids"]]
+    new_id, rng, start_day = SCHEMES[scheme], random.Random(args.seed), date(2020, 1, 1)
+    segment_rows, rates = args.rows // SEGMENTS, []
+    with Session(engine) as session:
+        for _ in range(SEGMENTS):
+            start = time.perf_counter()
+            for offset in range(0, segment_rows, args.batch):
+                session.execute(insert(Transaction.__table__), [
+                    {"id": new_id(), "user_id": user_id, "account_id": account_id, "category_id": rng.choice(category_ids),
+                     "amount": Decimal(rng.randint(-50000, 50000)) / 100, "description": "BENCH",
+                     "transaction_date": start_day + timedelta(days=rng.randrange(2000))}
+                    for _ in range(min(args.batch, segment_rows - offset))])
+                session.commit()
+            rates.append(segment_rows / (time.perf_counter() - start))
+    engine.dispose()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help='Must contain "{scheme}"; defaults to a temporary SQLite file per scheme.')
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp()
+    results = {}
+    for scheme in SCHEMES:
+        database_url = (args.database_url.replace("{scheme}", scheme) if args.database_url
+                        else "sqlite:///" + os.path.join(workdir, f"{scheme}.sqlite"))
+        results[scheme] = run_scheme(args, scheme, database_url)
+    print(f"{'rows':>10} " + " ".join(f"{scheme:>12}" for scheme in SCHEMES))
+    for segment in range(SEGMENTS):
+        print(f"{(segment + 1) * (args.rows // SEGMENTS):>10} " + " ".join(f"{results[s][segment]:>8.0f} r/s" for s in SCHEMES))
+    for scheme, rates in results.items():
+        print(f"{scheme}: overall {len(rates) / sum(1 / rate for rate in rates):.0f} rows/s, last segment {rates[-1]:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time a statement import with duplicate detection against an account with a large transaction history.
+
+    python benchmarks/import_dedup.py --history 300000 --rows 50000 --overlap 0.5
+
+Seeds `--history` fingerprinted transactions, then imports a `--rows` CSV twice through the same code path as
+/transactions/upload: read_statement batches, DuplicateDetector lookups and batched pending inserts. `--overlap`
+of the rows repeat finalized transactions. The second import of the same file should report every row as a
+duplicate. Uses a throwaway SQLite database.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+import importer  # noqa: E402
+from models import Account, AccountType, Category, CategoryType, Transaction, User  # noqa: E402
+
+START = date(2000, 1, 1)
+
+
+def statement_line(i):
+    return START + timedelta(days=i % 9000), round(1 + (i * 7919 % 50000) / 100, 2), f"MERCHANT {i % 5003} REF {i}"
+
+
+def seed(engine, history):
+    with Session(engine) as session:
+        user = User(username="bench", email="bench@example.com", hashed_password="x")
+        account = Account(user_id=user.id, name="Checking", type=AccountType.CHECKING)
+        category = Category(user_id=user.id, name="Food", type=CategoryType.CASH, budgeted_amount=100)
+        session.add_all([user, account, category])
+        session.commit()
+        for start in range(0, history, 5000):
+            rows = []
+            for i in range(start, min(start + 5000, history)):
+                day, amount, description = statement_line(i)
+                rows.append({"id": uuid4(), "user_id": user.id, "account_id": account.id, "category_id": category.id, "amount": -amount,
+                             "description": description, "transaction_date": day,
+                             "fingerprint": importer.fingerprint(AccountType.CHECKING, day, amount, description)})
+            session.execute(insert(Transaction.__table__), rows)
+        session.commit()
+        return user.id
+
+
+def run_import(engine, user_id, data):
+    imported = duplicates = 0
+    detector = importer.DuplicateDetector(user_id)
+    with Session(engine) as session:
+        for batch, _ in importer.read_statement(io.BytesIO(data), user_id, AccountType.CHECKING):
+            flags = detector.check(session, batch)
+            batch = [row for row, duplicate in zip(batch, flags) if not duplicate]
+            if batch: importer.insert_pending_batch(session, batch)
+            session.commit()
+            imported += len(batch)
+            duplicates += sum(flags)
+    return imported, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=300000)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    SQLModel.metadata.create_all(engine)
+    start = time.perf_counter()
+    user_id = seed(engine, args.history)
+    print(f"seeded {args.history} transactions in {time.perf_counter() - start:.1f}s")
+
+    overlapping = int(args.rows * args.overlap)
+    indexes = random.sample(range(args.history), min(overlapping, args.history)) + \
+        list(range(args.history, args.history + args.rows - overlapping))
+    lines = ["Date,Description,Amount"] + [f"{d.isoformat()},{desc},{amount:.2f}" for d, amount, desc in map(statement_line, indexes)]
+    data = "\n".join(lines).encode()
+    for attempt in ("first import", "re-import"):
+        start = time.perf_counter()
+        imported, duplicates = run_import(engine, user_id, data)
+        print(f"{attempt:<13} rows={len(indexes)} imported={imported} duplicates={duplicates} {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Load-test the main read and write endpoints against generated datasets of increasing size.
+
+    python benchmarks/load_test.py --sizes 12,36,120 --users 5 --requests 200 --concurrency 10 --output results.json
+    python benchmarks/load_test.py --database-url "mysql+mysqlconnector://root:pw@localhost/bench_{months}"
+    python benchmarks/load_test.py --url http://localhost:8000 --database-url mysql+mysqlconnector://... --sizes 36
+
+For every size (months of history per user) a dataset is built with benchmarks/datagen.py, then each scenario
+(/dashboard/v2, /transactions, /transactions/upload, /transactions/finalize) is driven with `--requests`
+requests at `--concurrency`, and throughput plus p50/p95/p99 latency are printed and saved as JSON along with
+the commit, database backend and settings, so runs can be compared across changes.
+
+By default the app runs in-process through httpx's ASGI transport on a throwaway SQLite file per size;
+`--database-url` may contain "{months}" to get one database per size. With `--url` the requests go to a
+running server instead, which must be using `--database-url` (and then only one size makes sense).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlmodel import create_engine  # noqa: E402
+
+import datagen  # noqa: E402
+import db  # noqa: E402
+from cache import response_cache  # noqa: E402
+from main import app  # noqa: E402
+from migrations import create_database  # noqa: E402
+
+SCENARIOS = ("dashboard", "transactions", "upload", "finalize")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, errors, elapsed):
+    if not samples: return {"requests": errors, "errors": errors}
+    return {"requests": len(samples) + errors, "errors": errors, "throughput_rps": round(len(samples) / elapsed, 2),
+            **{f"p{pct}_ms": round(percentile(samples, pct) * 1000, 2) for pct in (50, 95, 99)},
+            "mean_ms": round(statistics.mean(samples) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+async def drive(requests, concurrency):
+    """Run the request coroutine factories with at most `concurrency` in flight; returns (latencies, errors, wall time)."""
+    samples, errors, gate = [], 0, asyncio.Semaphore(concurrency)
+
+    async def one(make_request):
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            response = await make_request()
+            if response.is_success: samples.append(time.perf_counter() - start)
+            else: errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(make_request) for make_request in requests))
+    return samples, errors, time.perf_counter() - start
+
+
+def statement_csv(rng, year, month, rows):
+    lines = ["Date,Description,Amount"]
+    for _ in range(rows):
+        lines.append(f"{year:04d}-{month:02d}-{rng.randint(1, 28):02d},LOAD TEST MERCHANT {rng.randint(1, 10 ** 9)},"
+                     f"{rng.uniform(2, 300):.2f}")
+    return "\n".join(lines).encode()
+
+
+async def build_scenarios(client, data, headers, args, rng):
+    users, months = data["users"], data["months"]
+
+    def pick():
+        user = rng.choice(users)
+        return user, headers[user["username"]], rng.choice(months)
+
+    def dashboard():
+        user, auth, (year, month) = pick()
+        return lambda: client.get("/dashboard/v2", params={"year": year, "month": month}, headers=auth)
+
+    def transactions():
+        user, auth, (year, month) = pick()
+        return lambda: client.get("/transactions", params={"year": year, "month": month, "account_id": user["checking_id"]},
+                                  headers=auth)
+
+    def upload():
+        user, auth, (year, month) = pick()
+        body = statement_csv(rng, year, month, args.upload_rows)
+        return lambda: client.post("/transactions/upload", params={"account_type": "Checking"}, headers=auth,
+                                   files={"file": ("statement.csv", body, "text/csv")})
+
+    # Finalize consumes the generated pending rows, so it gets as many requests as there are batches to finalize.
+    batches = []
+    for user in users:
+        auth = headers[user["username"]]
+        pending = (await client.get("/transactions/pending", params={"account_type": "Checking"}, headers=auth)).json()
+        for start in range(0, len(pending) - args.finalize_rows + 1, args.finalize_rows):
+            batches.append((auth, [{"pending_transaction_id": row["id"], "account_id": user["checking_id"],
+                                    "category_id": rng.choice(user["category_ids"])} for row in pending[start:start + args.finalize_rows]]))
+    rng.shuffle(batches)
+
+    def finalize(auth, body): return lambda: client.post("/transactions/finalize", json=body, headers=auth)
+
+    return {"dashboard": [dashboard() for _ in range(args.requests)],
+            "transactions": [transactions() for _ in range(args.requests)],
+            "upload": [upload() for _ in range(args.requests)],
+            "finalize": [finalize(auth, body) for auth, body in batches[:args.requests]]}
+
+
+async def run_size(args, months, database_url):
+    rng = random.Random(args.seed)
+    engine = create_engine(database_url, **db.engine_options(database_url))
+    start = time.perf_counter()
+    data = datagen.generate(engine, args.users, months, args.pending, seed=args.seed)
+    print(f"\n{months} months: generated {data['counts']} in {time.perf_counter() - start:.1f}s")
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        app.state.engine = engine
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+    results = []
+    async with client:
+        headers = {}
+        for user in data["users"]:
+            token = await client.post("/auth/token", data={"username": user["username"], "password": data["password"]})
+            token.raise_for_status()
+            headers[user["username"]] = {"Authorization": f"Bearer {token.json()['access_token']}"}
+        scenarios = await build_scenarios(client, data, headers, args, rng)
+        for name in args.scenarios:
+            samples, errors, elapsed = await drive(scenarios[name], args.concurrency)
+            result = {"scenario": name, "months": months, **data["counts"], "concurrency": args.concurrency,
+                      **summarize(samples, errors, elapsed)}
+            results.append(result)
+            print(f"  {name:<13} n={result['requests']:<5} err={errors:<3} {result.get('throughput_rps', 0):8.1f} req/s "
+                  f"p50={result.get('p50_ms', 0):7.1f}ms p95={result.get('p95_ms', 0):7.1f}ms p99={result.get('p99_ms', 0):7.1f}ms")
+    engine.dispose()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    if args.no_cache: response_cache.backend = None
+    workdir = tempfile.mkdtemp()
+    results, backend = [], None
+    for months in args.sizes:
+        database_url = (args.database_url.replace("{months}", str(months)) if args.database_url
+                        else "sqlite:///" + os.path.join(workdir, f"bench_{months}.sqlite"))
+        backend = make_url(database_url).get_backend_name()
+        create_database(database_url)
+        results.extend(await run_size(args, months, database_url))
+    report = {"metadata": {"commit": git_commit(), "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                           "python": platform.python_version(), "platform": platform.platform(), "database": backend,
+                           "target": args.url or "in-process", "response_cache": not args.no_cache and not args.url,
+                           "settings": {key: value for key, value in vars(args).items() if key not in ("output", "database_url")}},
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as f: json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(part) for part in value.split(",")], default=[12, 36],
+                        help="Comma-separated months of history per user, one dataset each.")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--pending", type=int, default=500, help="Pending statement rows per user (consumed by finalize).")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--upload-rows", type=int, default=100)
+    parser.add_argument("--finalize-rows", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the in-process response cache.")
+    parser.add_argument("--database-url", help='Defaults to a temporary SQLite file per size; may contain "{months}".')
+    parser.add_argument("--url", help="Base URL of a running server to test instead of the in-process app.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+    if unknown := set(args.scenarios) - set(SCENARIOS): parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(run(args))
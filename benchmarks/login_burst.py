@@ -0,0 +1,84 @@
+"""Measure /dashboard/v2 latency on its own and while a burst of logins is running.
+
+    python benchmarks/login_burst.py --logins 200 --dashboards 300
+    python benchmarks/login_burst.py --mode threadpool   # previous behaviour: hash inline on the request threadpool
+
+In the default mode logins hash on auth.password_hasher's bounded pool (PASSWORD_HASH_WORKERS threads), and
+excess logins get a 429. The comparison is only meaningful with more cores than hash workers. Uses a throwaway
+SQLite database and drives the app in-process through httpx's ASGI transport.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+
+import httpx  # noqa: E402
+from sqlmodel import SQLModel, create_engine  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+import auth  # noqa: E402
+import db  # noqa: E402
+from main import app  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(name, samples):
+    print(f"{name:<28} n={len(samples):<5} p50={percentile(samples, 50) * 1000:7.1f}ms "
+          f"p99={percentile(samples, 99) * 1000:7.1f}ms mean={statistics.mean(samples) * 1000:7.1f}ms")
+
+
+async def timed_get(client, url, headers, samples):
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    response.raise_for_status()
+    samples.append(time.perf_counter() - start)
+
+
+async def login(client, statuses):
+    response = await client.post("/auth/token", data={"username": "bench", "password": "bench-password"})
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run(args):
+    if args.mode == "threadpool":
+        auth.password_hasher._run = lambda fn, *fn_args: run_in_threadpool(fn, *fn_args)
+    SQLModel.metadata.create_all(create_engine(os.environ["DATABASE_URL"]))
+    app.state.engine = db.create_request_engine()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/register", json={"username": "bench", "email": "bench@example.com", "password": "bench-password"})
+        token = (await client.post("/auth/token", data={"username": "bench", "password": "bench-password"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        url = "/dashboard/v2?year=2024&month=1"
+
+        idle = []
+        for _ in range(args.dashboards // args.concurrency):
+            await asyncio.gather(*(timed_get(client, url, headers, idle) for _ in range(args.concurrency)))
+        report("dashboard, idle", idle)
+
+        during, statuses = [], {}
+        burst = asyncio.gather(*(login(client, statuses) for _ in range(args.logins)))
+        for _ in range(args.dashboards // args.concurrency):
+            await asyncio.gather(*(timed_get(client, url, headers, during) for _ in range(args.concurrency)))
+        await burst
+        report("dashboard, during logins", during)
+        print(f"login responses: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--dashboards", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mode", choices=["pool", "threadpool"], default="pool")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""Compare float and Decimal money on the hot path: loading amounts, summing them and rendering JSON.
+
+    python benchmarks/money.py --users 5 --months 60
+    python benchmarks/money.py --database-url mysql+mysqlconnector://root:pw@localhost/bench_money
+
+Every generated transaction is loaded twice: with the amount typed as Float (what the models declared before)
+and as the model's Numeric column (Decimal). Each variant is then summed in Python and rendered with
+FastJSONResponse. "drift" is how far the Python total is from the exact SQL total. MySQL returns DECIMAL columns
+as Decimal, so there Float pays the conversion per row; SQLite stores NUMERIC as REAL, so there Decimal pays it.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Float, func, type_coerce  # noqa: E402
+from sqlmodel import Session, create_engine, select  # noqa: E402
+
+import datagen  # noqa: E402
+from models import Transaction  # noqa: E402
+from responses import FastJSONResponse, rows_as_dicts  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(args):
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "money.sqlite")
+    engine = create_engine(database_url)
+    data = datagen.generate(engine, args.users, args.months, 0, seed=args.seed)
+    print(f"{data['counts']['transactions']} transactions on {engine.dialect.name}")
+
+    with Session(engine) as session:
+        exact = session.exec(select(func.sum(Transaction.amount))).one()
+        variants = {"float": (type_coerce(Transaction.amount, Float).label("amount"), 0.0),
+                    "decimal": (Transaction.amount, Decimal(0))}
+        print(f"{'variant':<8} {'load':>9} {'sum':>9} {'render':>9} {'total':>9}  drift")
+        for name, (amount, zero) in variants.items():
+            query = select(Transaction.id, amount, Transaction.transaction_date)
+            load, rows = best_of(args.repeat, lambda: rows_as_dicts(session.execute(query)))
+            add, total = best_of(args.repeat, lambda: sum((row["amount"] for row in rows), zero))
+            render, _ = best_of(args.repeat, lambda: FastJSONResponse(rows).body)
+            drift = abs(Decimal(total) - exact)
+            print(f"{name:<8} {load * 1000:7.1f}ms {add * 1000:7.1f}ms {render * 1000:7.1f}ms "
+                  f"{(load + add + render) * 1000:7.1f}ms  {drift:.2E}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--months", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file.")
+    run(parser.parse_args())
@@ -0,0 +1,81 @@
+"""Compare the ORM + response_model path with the Core rows + orjson path for a large transaction listing.
+
+    python benchmarks/serialization.py --rows 10000 --repeat 5
+
+"orm+pydantic" mirrors what FastAPI does for `response_model=List[TransactionPublic]` with ORM objects: hydrate
+Transaction instances, validate each into TransactionPublic, encode to JSON-compatible data and dump with the
+stdlib encoder. "core+orjson" is the path the listing endpoints now use. Both read from a throwaway SQLite database.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from models import Account, AccountType, Category, CategoryType, Transaction, TransactionPublic, User  # noqa: E402
+from responses import FastJSONResponse, public_columns, rows_as_dicts  # noqa: E402
+
+
+def seed(engine, rows):
+    with Session(engine) as session:
+        user = User(username="bench", email="bench@example.com", hashed_password="x")
+        account = Account(user_id=user.id, name="Checking", type=AccountType.CHECKING)
+        category = Category(user_id=user.id, name="Food", type=CategoryType.CASH, budgeted_amount=100)
+        session.add_all([user, account, category])
+        session.commit()
+        start = date(2015, 1, 1)
+        session.execute(insert(Transaction.__table__), [
+            {"id": uuid4(), "user_id": user.id, "account_id": account.id, "category_id": category.id,
+             "amount": -round(random.uniform(1, 500), 2), "description": f"Merchant {i % 997}",
+             "transaction_date": start + timedelta(days=i % 3650)} for i in range(rows)])
+        session.commit()
+        return user.id
+
+
+def orm_pydantic(engine, user_id):
+    adapter = TypeAdapter(List[TransactionPublic])
+    with Session(engine) as session:
+        txs = session.exec(select(Transaction).where(Transaction.user_id == user_id)).all()
+        return json.dumps(adapter.dump_python(adapter.validate_python(txs, from_attributes=True), mode="json")).encode()
+
+
+def core_orjson(engine, user_id):
+    with Session(engine) as session:
+        rows = rows_as_dicts(session.execute(select(*public_columns(Transaction, TransactionPublic)).where(Transaction.user_id == user_id)))
+        return FastJSONResponse(rows).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    SQLModel.metadata.create_all(engine)
+    user_id = seed(engine, args.rows)
+    if json.loads(orm_pydantic(engine, user_id)) != json.loads(core_orjson(engine, user_id)):
+        sys.exit("The two paths produced different JSON documents")
+    for name, fn in [("orm+pydantic", orm_pydantic), ("core+orjson", core_orjson)]:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn(engine, user_id)
+            samples.append(time.perf_counter() - start)
+        print(f"{name:<14} rows={args.rows} median={statistics.median(samples) * 1000:8.1f}ms min={min(samples) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
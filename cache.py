@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from fastapi import Request, Response
+
+from responses import FastJSONResponse
+
+# "memory" keeps entries in this process; a redis:// URL shares them (and their invalidations) between workers,
+# which is what a multi-worker deployment needs. "none" disables caching but keeps ETag/304 handling.
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "memory")
+# A write only invalidates the memory backend of the worker that handled it; the others keep serving (and 304ing)
+# their entry until it expires, so without a shared backend entries only live a few seconds.
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5" if RESPONSE_CACHE_URL == "memory" else "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+ETAG_LENGTH = 32
+
+
+class MemoryBackend:
+    # In-process stand-in for the subset of the redis.asyncio client API the cache uses (get/mget/set/incr).
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}  # never evicted, so a version can't fall back to a value already used
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        if key in self._counters: return str(self._counters[key]).encode()
+        entry = self._entries.get(key)
+        if not entry: return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock: return self._get(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock: return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value, ex: Optional[int] = None, nx: bool = False):
+        with self._lock:
+            if nx and self._get(key) is not None: return None
+            if isinstance(value, int):
+                self._counters[key] = value
+                return True
+            self._entries[key] = (value, time.monotonic() + ex if ex else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+            return True
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+def create_backend(url: str = RESPONSE_CACHE_URL):
+    if url == "none": return None
+    if url == "memory": return MemoryBackend()
+    import redis.asyncio  # optional dependency, only needed for a shared cache
+    return redis.asyncio.from_url(url)
+
+
+class ResponseCache:
+    """Per-user cache of rendered JSON responses for read-heavy endpoints.
+
+    Each user has a version counter per table. A cache key embeds the current versions of the tables the
+    endpoint reads, so a write only has to bump a counter (`invalidate`) for every older entry to stop matching.
+    """
+
+    def __init__(self, backend, ttl: int = RESPONSE_CACHE_TTL, prefix: str = "budget:"):
+        self.backend, self.ttl, self.prefix = backend, ttl, prefix
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _version_keys(self, user_id: UUID, tables: Iterable[str]) -> List[str]:
+        return [f"{self.prefix}ver:{user_id}:{table}" for table in tables]
+
+    async def _versions(self, keys: List[str]) -> List[bytes]:
+        versions = await self.backend.mget(keys)
+        if None not in versions: return versions
+        # Seed missing counters from the clock rather than 0: if a counter is ever evicted it restarts above any
+        # value it had before, so entries cached under the old value can't be served again.
+        for key, version in zip(keys, versions):
+            if version is None: await self.backend.set(key, time.time_ns(), nx=True)
+        return await self.backend.mget(keys)
+
+    async def invalidate(self, user_id: UUID, *tables: str):
+        if self.backend is None: return
+        for key in self._version_keys(user_id, tables): await self.backend.incr(key)
+
+    async def respond(self, request: Request, user_id: UUID, tables: Iterable[str], build: Callable[[], Awaitable[Any]]) -> Response:
+        """Serve the cached body for this user, path and query if the tables are unchanged, else `await build()` and cache it."""
+        key = None
+        if self.backend is not None:
+            versions = await self._versions(self._version_keys(user_id, tables))
+            query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+            key = f"{self.prefix}resp:{user_id}:{request.url.path}?{query}:" + ".".join(v.decode() if isinstance(v, bytes) else str(v)
+                                                                                         for v in versions)
+            cached = await self.backend.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return self._response(request, cached[:ETAG_LENGTH].decode(), cached[ETAG_LENGTH:])
+            self.stats["misses"] += 1
+        body = FastJSONResponse(await build()).body
+        etag = hashlib.blake2b(body, digest_size=ETAG_LENGTH // 2).hexdigest()
+        if key is not None: await self.backend.set(key, etag.encode() + body, ex=self.ttl)
+        return self._response(request, etag, body)
+
+    def _response(self, request: Request, etag: str, body: bytes) -> Response:
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or
+                              f'"{etag}"' in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def close(self):
+        close = getattr(self.backend, "aclose", None) or getattr(self.backend, "close", None)
+        if close: await close()
+
+
+response_cache = ResponseCache(create_backend())
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from importer import normalize_description
+from models import Transaction
+
+# Indexes are rebuilt after this long, which picks up edits and deletes made through other workers.
+CATEGORIZER_TTL = float(os.getenv("CATEGORIZER_TTL_SECONDS", "3600"))
+CATEGORIZER_USERS = int(os.getenv("CATEGORIZER_USERS", "1000"))
+# Share of the token votes the best category needs when there is no exact description match.
+MIN_TOKEN_SCORE = 0.6
+
+
+def tokens(normalized: str) -> List[str]:
+    # Digits are mostly card, store or reference numbers that change between statements.
+    return [token for token in set(normalized.split()) if len(token) > 1 and not any(c.isdigit() for c in token)]
+
+
+class CategoryIndex:
+    """Description -> category votes for one user's transaction history. An exact normalized description match wins."""
+
+    def __init__(self):
+        # Votes are counted per category position rather than per UUID; hashing a UUID costs a Python-level call.
+        self.category_ids: List[UUID] = []
+        self._positions: Dict[UUID, int] = {}
+        self.exact: Dict[str, Counter] = defaultdict(Counter)
+        self.by_token: Dict[str, Counter] = defaultdict(Counter)
+        self.token_totals: Counter = Counter()
+
+    def learn(self, description: str, category_id: UUID, count: int = 1):
+        normalized = normalize_description(description)
+        if not normalized: return
+        position = self._positions.setdefault(category_id, len(self.category_ids))
+        if position == len(self.category_ids): self.category_ids.append(category_id)
+        self.exact[normalized][position] += count
+        for token in tokens(normalized):
+            self.by_token[token][position] += count
+            self.token_totals[token] += count
+
+    def suggest(self, description: str) -> Optional[UUID]:
+        normalized = normalize_description(description)
+        if normalized in self.exact: return self.category_ids[self.exact[normalized].most_common(1)[0][0]]
+        # Each token votes with its category distribution, weighted by how decisive it is (its top category's
+        # share), so "store" or "payment" barely count next to a merchant name.
+        scores, weights = Counter(), 0.0
+        for token in tokens(normalized):
+            counts = self.by_token.get(token)
+            if not counts: continue
+            total = self.token_totals[token]
+            weight = max(counts.values()) / total
+            weights += weight
+            for position, count in counts.items(): scores[position] += weight * count / total
+        if not scores: return None
+        position, score = scores.most_common(1)[0]
+        return self.category_ids[position] if score / weights >= MIN_TOKEN_SCORE else None
+
+
+class Categorizer:
+    # LRU of per-user indexes; built from one grouped query on first use, then kept current by learn().
+    def __init__(self, max_users: int = CATEGORIZER_USERS, ttl: float = CATEGORIZER_TTL):
+        self.max_users, self.ttl = max_users, ttl
+        self._indexes: "OrderedDict[UUID, Tuple[CategoryIndex, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build(self, session: Session, user_id: UUID) -> CategoryIndex:
+        index = CategoryIndex()
+        for description, category_id, count in session.exec(
+                select(Transaction.description, Transaction.category_id, func.count())
+                .where(Transaction.user_id == user_id, Transaction.description.is_not(None))
+                .group_by(Transaction.description, Transaction.category_id)):
+            index.learn(description, category_id, count)
+        return index
+
+    def index_for(self, session: Session, user_id: UUID) -> CategoryIndex:
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry and entry[1] >= time.monotonic():
+                self._indexes.move_to_end(user_id)
+                return entry[0]
+        index = self._build(session, user_id)
+        with self._lock:
+            self._indexes[user_id] = (index, time.monotonic() + self.ttl)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users: self._indexes.popitem(last=False)
+        return index
+
+    def suggest(self, session: Session, user_id: UUID, descriptions: Iterable[str]) -> List[Optional[UUID]]:
+        index, memo = self.index_for(session, user_id), {}
+        with self._lock:
+            return [memo[d] if d in memo else memo.setdefault(d, index.suggest(d)) for d in descriptions]
+
+    def learn(self, user_id: UUID, labelled: Iterable[Tuple[str, UUID]]):
+        # Only an index that is already loaded needs updating; a missing one is built from the table, which has these rows.
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry:
+                for description, category_id in labelled: entry[0].learn(description, category_id)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock: self._indexes.pop(user_id, None)
+
+
+categorizer = Categorizer()
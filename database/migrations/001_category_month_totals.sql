@@ -0,0 +1,24 @@
+-- Adds the category_month_totals rollup to an existing database and backfills it from transactions.
+USE `trisphere_budget`;
+
+CREATE TABLE IF NOT EXISTS `category_month_totals` (
+    `user_id` BINARY(16) NOT NULL,
+    `account_id` BINARY(16) NOT NULL,
+    `category_id` BINARY(16) NOT NULL,
+    `year` SMALLINT NOT NULL,
+    `month` TINYINT NOT NULL,
+    `total_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    `abs_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    `tx_count` INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`user_id`, `account_id`, `category_id`, `year`, `month`),
+    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`account_id`) REFERENCES `accounts` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DELETE FROM `category_month_totals`;
+INSERT INTO `category_month_totals` (`user_id`, `account_id`, `category_id`, `year`, `month`, `total_amount`, `abs_amount`, `tx_count`)
+SELECT `user_id`, `account_id`, `category_id`, YEAR(`transaction_date`), MONTH(`transaction_date`),
+       SUM(`amount`), SUM(ABS(`amount`)), COUNT(*)
+FROM `transactions`
+GROUP BY `user_id`, `account_id`, `category_id`, YEAR(`transaction_date`), MONTH(`transaction_date`);
@@ -0,0 +1,17 @@
+-- Composite indexes and key order matching the hot query shapes of the API.
+-- `python manage.py migrate-indexes` applies the same indexes and skips the ones that already exist.
+USE `trisphere_budget`;
+
+ALTER TABLE `transactions`
+    ADD KEY `ix_transactions_user_account_date` (`user_id`, `account_id`, `transaction_date`),
+    ADD KEY `ix_transactions_user_category` (`user_id`, `category_id`),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE `pending_transactions`
+    ADD KEY `ix_pending_user_account_type_date` (`user_id`, `target_account_type`, `transaction_date`),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Dashboard reads filter the rollup on (user, account, year, month); put the month before the category.
+ALTER TABLE `category_month_totals`
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (`user_id`, `account_id`, `year`, `month`, `category_id`);
@@ -0,0 +1,4 @@
+-- Token version embedded in every JWT; incrementing it revokes a user's outstanding tokens.
+USE `trisphere_budget`;
+
+ALTER TABLE `users` ADD COLUMN `token_version` INT NOT NULL DEFAULT 0 AFTER `hashed_password`;
@@ -0,0 +1,14 @@
+-- Statement-line fingerprints used by the importer to skip or flag re-imported rows.
+-- Existing rows start without a fingerprint; fill them in with `python manage.py backfill-fingerprints`.
+USE `trisphere_budget`;
+
+ALTER TABLE `transactions`
+    ADD COLUMN `fingerprint` VARCHAR(32) NULL AFTER `transaction_date`,
+    ADD KEY `ix_transactions_user_fingerprint` (`user_id`, `fingerprint`),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE `pending_transactions`
+    ADD COLUMN `fingerprint` VARCHAR(32) NULL AFTER `target_account_type`,
+    ADD COLUMN `possible_duplicate` BOOLEAN NOT NULL DEFAULT FALSE AFTER `fingerprint`,
+    ADD KEY `ix_pending_user_fingerprint` (`user_id`, `fingerprint`),
+    ALGORITHM=INPLACE, LOCK=NONE;
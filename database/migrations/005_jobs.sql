@@ -0,0 +1,19 @@
+-- Background jobs table used by jobs.py for statement imports and savings funding.
+USE `trisphere_budget`;
+
+CREATE TABLE IF NOT EXISTS `jobs` (
+    `id` BINARY(16) NOT NULL PRIMARY KEY,
+    `user_id` BINARY(16),
+    `kind` VARCHAR(32) NOT NULL,
+    `status` ENUM('queued', 'running', 'succeeded', 'failed') NOT NULL,
+    `progress` INT NOT NULL DEFAULT 0,
+    `total` INT,
+    `result` JSON,
+    `error` VARCHAR(1000),
+    `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `started_at` DATETIME,
+    `updated_at` DATETIME NOT NULL,
+    `finished_at` DATETIME,
+    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    KEY `ix_jobs_user_created` (`user_id`, `created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
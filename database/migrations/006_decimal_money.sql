@@ -0,0 +1,13 @@
+-- Money columns as DECIMAL, matching schema.sql. Only databases created by SQLModel.metadata.create_all before
+-- the models declared Decimal amounts have FLOAT columns here; on the others these statements change nothing.
+-- Afterwards recompute the rollups from the now-exact amounts with `python manage.py rebuild-rollups`.
+USE `trisphere_budget`;
+
+ALTER TABLE `accounts` MODIFY `initial_balance` DECIMAL(10, 2) NOT NULL DEFAULT 0.00;
+ALTER TABLE `categories` MODIFY `budgeted_amount` DECIMAL(10, 2) NOT NULL DEFAULT 0.00;
+ALTER TABLE `monthly_budgets` MODIFY `budgeted_amount` DECIMAL(10, 2) NOT NULL;
+ALTER TABLE `transactions` MODIFY `amount` DECIMAL(10, 2) NOT NULL;
+ALTER TABLE `pending_transactions` MODIFY `amount` DECIMAL(10, 2) NOT NULL;
+ALTER TABLE `category_month_totals`
+    MODIFY `total_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    MODIFY `abs_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00;
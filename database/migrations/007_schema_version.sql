@@ -0,0 +1,9 @@
+-- Applied migration versions. `python manage.py migrate` creates this table, applies the files newer than the
+-- recorded version and records them; workers started with FAST_START=1 only check it.
+-- A database migrated by hand up to this file: record it with `python manage.py migrate --baseline 7`.
+USE `trisphere_budget`;
+
+CREATE TABLE IF NOT EXISTS `schema_version` (
+    `version` INT NOT NULL PRIMARY KEY,
+    `applied_at` DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
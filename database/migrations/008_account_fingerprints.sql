@@ -0,0 +1,8 @@
+-- Fingerprints now include the account type, so the same statement line uploaded to two accounts is not a duplicate.
+-- Fingerprints computed the old way would never match again; clear them, then refill them with
+-- `python manage.py backfill-fingerprints`. Until that has run, re-uploaded old lines are not detected as duplicates.
+USE `trisphere_budget`;
+
+UPDATE `pending_transactions` SET `fingerprint` = NULL WHERE `fingerprint` IS NOT NULL;
+
+UPDATE `transactions` SET `fingerprint` = NULL WHERE `fingerprint` IS NOT NULL;
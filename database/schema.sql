@@ -10,6 +10,7 @@ CREATE TABLE `users` (
     `username` VARCHAR(255) NOT NULL UNIQUE,
     `email` VARCHAR(255) NOT NULL UNIQUE,
     `hashed_password` VARCHAR(255) NOT NULL,
+    `token_version` INT NOT NULL DEFAULT 0,
     `is_active` BOOLEAN NOT NULL DEFAULT 1,
     `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
@@ -61,10 +62,15 @@ CREATE TABLE `transactions` (
     `amount` DECIMAL(10, 2) NOT NULL,
     `description` VARCHAR(255),
     `transaction_date` DATE NOT NULL,
+    -- Hash of the statement line (date, amount, normalized description) used to detect re-imports
+    `fingerprint` VARCHAR(32),
     `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
     FOREIGN KEY (`account_id`) REFERENCES `accounts` (`id`) ON DELETE CASCADE,
-    FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE RESTRICT
+    FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE RESTRICT,
+    KEY `ix_transactions_user_account_date` (`user_id`, `account_id`, `transaction_date`),
+    KEY `ix_transactions_user_category` (`user_id`, `category_id`),
+    KEY `ix_transactions_user_fingerprint` (`user_id`, `fingerprint`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create the new, smarter table for pending transactions
@@ -76,6 +82,54 @@ CREATE TABLE `pending_transactions` (
     `amount` DECIMAL(10, 2) NOT NULL,
     -- NEW: This column links the pending transaction to the account type of the active tab
     `target_account_type` ENUM('Checking', 'Savings') NOT NULL,
+    `fingerprint` VARCHAR(32),
+    `possible_duplicate` BOOLEAN NOT NULL DEFAULT FALSE,
     `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    KEY `ix_pending_user_account_type_date` (`user_id`, `target_account_type`, `transaction_date`),
+    KEY `ix_pending_user_fingerprint` (`user_id`, `fingerprint`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Rollup of transactions per user, account, category and calendar month.
+-- Maintained incrementally by every transaction write; rebuild with `python manage.py rebuild-rollups`.
+CREATE TABLE `category_month_totals` (
+    `user_id` BINARY(16) NOT NULL,
+    `account_id` BINARY(16) NOT NULL,
+    `category_id` BINARY(16) NOT NULL,
+    `year` SMALLINT NOT NULL,
+    `month` TINYINT NOT NULL,
+    `total_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    `abs_amount` DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    `tx_count` INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`user_id`, `account_id`, `year`, `month`, `category_id`),
+    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`account_id`) REFERENCES `accounts` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Background jobs (statement imports, savings funding); see jobs.py.
+CREATE TABLE `jobs` (
+    `id` BINARY(16) NOT NULL PRIMARY KEY,
+    `user_id` BINARY(16),
+    `kind` VARCHAR(32) NOT NULL,
+    `status` ENUM('queued', 'running', 'succeeded', 'failed') NOT NULL,
+    `progress` INT NOT NULL DEFAULT 0,
+    `total` INT,
+    `result` JSON,
+    `error` VARCHAR(1000),
+    `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `started_at` DATETIME,
+    `updated_at` DATETIME NOT NULL,
+    `finished_at` DATETIME,
+    FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    KEY `ix_jobs_user_created` (`user_id`, `created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Applied migration versions, checked by workers started with FAST_START=1; see manage.py migrate.
+CREATE TABLE `schema_version` (
+    `version` INT NOT NULL PRIMARY KEY,
+    `applied_at` DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- This file includes every migration up to and including this one.
+INSERT INTO `schema_version` (`version`, `applied_at`) VALUES (8, NOW());
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+
+# Multi-row INSERT that updates `update_columns` on key conflicts: ON DUPLICATE KEY UPDATE on MySQL,
+# ON CONFLICT DO UPDATE on SQLite (local development). With increment=True incoming values are added.
+def upsert(session: Session, table: Table, rows: List[Dict[str, Any]], conflict_columns: Sequence[str],
+           update_columns: Sequence[str], increment: bool = False):
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        incoming = stmt.inserted
+        return stmt.on_duplicate_key_update(
+            {c: table.c[c] + incoming[c] if increment else incoming[c] for c in update_columns})
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table).values(rows)
+        incoming = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={c: table.c[c] + incoming[c] if increment else incoming[c] for c in update_columns})
+    raise NotImplementedError(f"Upsert is not supported for the '{dialect}' dialect")
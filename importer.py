@@ -0,0 +1,163 @@
+import csv
+import hashlib
+import io
+import os
+import re
+from collections import Counter
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlmodel import Session, select
+
+from models import Account, AccountType, PendingTransaction, Transaction, uuid7
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+MAX_REPORTED_ERRORS = 100
+REQUIRED_COLUMNS = ("Description", "Date", "Amount")
+MAX_DESCRIPTION_LENGTH = 255
+CENT = Decimal("0.01")
+MAX_AMOUNT = Decimal("99999999.99")  # DECIMAL(10, 2)
+
+
+class StatementFormatError(ValueError):
+    pass
+
+
+def normalize_description(description: str) -> str:
+    # Banks differ between exports in case, punctuation and spacing; those differences don't make a new transaction.
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", description.casefold()).split())
+
+
+def fingerprint(account_type: AccountType, transaction_date: date, amount: Decimal, description: str) -> str:
+    # The account type is part of the key: the same line on two accounts' statements (a transfer) is two transactions.
+    key = f"{AccountType(account_type).value}|{transaction_date.isoformat()}|{abs(amount):.2f}|{normalize_description(description)}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def parse_amount(value: Optional[str]) -> Decimal:
+    # Parsed straight to Decimal: going through float would round-trip every amount through binary floating point.
+    try:
+        amount = abs(Decimal((value or "").strip()))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    if not amount.is_finite() or amount > MAX_AMOUNT: raise ValueError(f"Invalid amount: {value!r}")
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def parse_row(row: Dict[str, str], user_id: UUID, account_type: AccountType) -> Dict[str, Any]:
+    description = (row["Description"] or "").strip()
+    if not description: raise ValueError("Description is empty")
+    if len(description) > MAX_DESCRIPTION_LENGTH: raise ValueError(f"Description is longer than {MAX_DESCRIPTION_LENGTH} characters")
+    transaction_date = datetime.strptime((row["Date"] or "").strip(), "%Y-%m-%d").date()
+    amount = parse_amount(row["Amount"])
+    return {"id": uuid7(), "user_id": user_id, "statement_description": description, "transaction_date": transaction_date,
+            "amount": -amount, "target_account_type": account_type,
+            "fingerprint": fingerprint(account_type, transaction_date, amount, description), "possible_duplicate": False}
+
+
+class ImportSummary:
+    # Running totals for one statement upload, reported back as the upload response or the import job's result.
+    def __init__(self):
+        self.imported, self.duplicates, self.failed, self.errors = 0, 0, 0, []
+
+    @property
+    def processed(self) -> int:
+        return self.imported + self.duplicates + self.failed
+
+    def add(self, inserted: int, duplicates: int, errors: List[Dict[str, Any]]):
+        self.imported += inserted
+        self.duplicates += duplicates
+        self.failed += len(errors)
+        self.errors.extend(errors[:MAX_REPORTED_ERRORS - len(self.errors)])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"message": f"Successfully imported {self.imported} transactions for review.", "imported": self.imported,
+                "duplicates": self.duplicates, "failed": self.failed, "errors": self.errors}
+
+
+def read_statement(binary_file: IO[bytes], user_id: UUID, account_type: AccountType,
+                   batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Decode and validate a CSV statement incrementally, yielding (valid rows, row errors) per batch."""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or any(column not in reader.fieldnames for column in REQUIRED_COLUMNS):
+            raise StatementFormatError("CSV must contain 'Description', 'Date', and 'Amount' columns.")
+        batch, errors = [], []
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:  # e.g. a field over csv.field_size_limit(); the reader resumes on the next line
+                errors.append({"line": reader.reader.line_num, "error": str(e)})
+            else:
+                try:
+                    batch.append(parse_row(row, user_id, account_type))
+                except (ValueError, TypeError) as e:
+                    errors.append({"line": reader.line_num, "error": str(e)})
+            if len(batch) >= batch_size:
+                yield batch, errors
+                batch, errors = [], []
+        if batch or errors: yield batch, errors
+    finally:
+        text.detach()
+
+
+def insert_pending_batch(session: Session, rows: List[Dict[str, Any]]):
+    session.execute(insert(PendingTransaction.__table__).values(rows))
+
+
+class DuplicateDetector:
+    """Marks statement rows that are already pending or finalized, one upload at a time.
+
+    Fingerprints are counted rather than just tested for presence: a statement can legitimately contain two
+    identical lines (two coffees on the same day), so the n-th occurrence of a fingerprint in the file is a
+    duplicate only if at least n rows with it were stored before this upload started.
+    """
+
+    def __init__(self, user_id: UUID):
+        self.user_id = user_id
+        self.stored: Dict[str, int] = {}
+        self.seen: Counter = Counter()
+
+    def _load(self, session: Session, fingerprints: List[str]):
+        counts = Counter()
+        for table in (PendingTransaction, Transaction):
+            counts.update(dict(session.exec(select(table.fingerprint, func.count())
+                                            .where(table.user_id == self.user_id, table.fingerprint.in_(fingerprints))
+                                            .group_by(table.fingerprint)).all()))
+        for fp in fingerprints: self.stored[fp] = counts[fp]
+
+    def check(self, session: Session, batch: List[Dict[str, Any]]) -> List[bool]:
+        # Only fingerprints new to this upload are looked up: by the next batch this upload's own rows are pending too.
+        new = list({row["fingerprint"] for row in batch} - self.stored.keys())
+        if new: self._load(session, new)
+        flags = []
+        for row in batch:
+            self.seen[row["fingerprint"]] += 1
+            flags.append(self.seen[row["fingerprint"]] <= self.stored[row["fingerprint"]])
+        return flags
+
+
+def backfill_fingerprints(session: Session, user_id: Optional[UUID] = None) -> int:
+    """Fingerprint rows stored before fingerprints existed, in IMPORT_BATCH_SIZE chunks committed one at a time."""
+    filled = 0
+    queries = ((PendingTransaction, select(PendingTransaction.id, PendingTransaction.target_account_type, PendingTransaction.transaction_date,
+                                           PendingTransaction.amount, PendingTransaction.statement_description)
+                .where(PendingTransaction.statement_description.is_not(None))),
+               (Transaction, select(Transaction.id, Account.type, Transaction.transaction_date, Transaction.amount, Transaction.description)
+                .join(Account, Account.id == Transaction.account_id).where(Transaction.description.is_not(None))))
+    for table, query in queries:
+        query = query.where(table.fingerprint.is_(None))
+        if user_id: query = query.where(table.user_id == user_id)
+        stmt = update(table.__table__).where(table.__table__.c.id == bindparam("row_id")).values(fingerprint=bindparam("fp"))
+        # Filled rows drop out of the filter, so re-running the same query walks through the table.
+        while rows := session.exec(query.limit(IMPORT_BATCH_SIZE)).all():
+            session.execute(stmt, [{"row_id": row[0], "fp": fingerprint(*row[1:])} for row in rows])
+            session.commit()
+            filled += len(rows)
+    return filled
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from db import SessionRunner
+from models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Jobs run on their own threads and their own engine, so a long import never holds request threads or connections.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+MAX_ERROR_LENGTH = 1000
+
+
+class JobFailed(Exception):
+    # An expected failure (bad input and the like): recorded as the job's error without a traceback in the logs.
+    pass
+
+
+class JobContext:
+    def __init__(self, session: Session, job_id: UUID):
+        self.session, self.job_id = session, job_id
+
+    def progress(self, done: int, total: Optional[int] = None):
+        # Commits the job's session, so call it between units of work, never in the middle of one.
+        values: Dict[str, Any] = {"progress": done, "updated_at": datetime.utcnow()}
+        if total is not None: values["total"] = total
+        self.session.execute(update(Job).where(Job.id == self.job_id).values(**values))
+        self.session.commit()
+
+
+class JobRunner:
+    """Runs job functions `fn(session, job: JobContext, *args) -> dict` on a thread pool and records them in `jobs`.
+
+    The returned dict is stored as the job's result; an exception fails the job with its message.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._engine: Optional[Engine] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks = set()
+        self._queued = set()
+
+    def start(self, engine: Engine):
+        self._engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+
+    async def submit(self, session: SessionRunner, user_id: Optional[UUID], kind: str, fn: Callable, *args,
+                     after: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Job:
+        """Persist a queued job and schedule it; `after(result)` then runs on the event loop if the job succeeds."""
+        if self._executor is None: raise RuntimeError("JobRunner.start() has not been called")
+        job = await session.run_sync(_insert_job, Job(user_id=user_id, kind=kind))
+        self._queued.add(job.id)
+        task = asyncio.create_task(self._run(job.id, fn, args, after))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job_id: UUID, fn: Callable, args: tuple, after):
+        result = await asyncio.get_running_loop().run_in_executor(self._executor, self._execute, job_id, fn, args)
+        if result is not None and after: await after(result)
+
+    def _execute(self, job_id: UUID, fn: Callable, args: tuple) -> Optional[Dict[str, Any]]:
+        self._queued.discard(job_id)
+        with Session(self._engine, expire_on_commit=False) as session:
+            _set_status(session, job_id, status=JobStatus.RUNNING, started_at=datetime.utcnow())
+            try:
+                result = fn(session, JobContext(session, job_id), *args)
+            except Exception as e:
+                session.rollback()
+                if not isinstance(e, (JobFailed, HTTPException)): logger.exception("Job %s failed", job_id)
+                error = str(e.detail if isinstance(e, HTTPException) else e) or type(e).__name__
+                _set_status(session, job_id, status=JobStatus.FAILED, error=error[:MAX_ERROR_LENGTH], finished_at=datetime.utcnow())
+                return None
+            _set_status(session, job_id, status=JobStatus.SUCCEEDED, result=result, finished_at=datetime.utcnow())
+            return result
+
+    def shutdown(self):
+        # This process's queued jobs are dropped with it; mark them failed rather than leaving them queued forever.
+        if self._executor is None: return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._queued:
+            with Session(self._engine) as session:
+                session.execute(update(Job).where(Job.id.in_(self._queued), Job.status == JobStatus.QUEUED)
+                                .values(status=JobStatus.FAILED, error="Cancelled by server shutdown", finished_at=datetime.utcnow()))
+                session.commit()
+        self._engine.dispose()
+
+
+def _insert_job(session: Session, job: Job) -> Job:
+    session.add(job)
+    session.commit()
+    return job
+
+
+def _set_status(session: Session, job_id: UUID, **values):
+    session.execute(update(Job).where(Job.id == job_id).values(updated_at=datetime.utcnow(), **values))
+    session.commit()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,81 @@
+import argparse
+import sys
+from uuid import UUID, uuid4
+
+from sqlalchemy import inspect
+from sqlmodel import Session, SQLModel, create_engine
+
+from db import DATABASE_URL_STR
+import importer
+import migrations
+import rollups
+from query_plans import check_query_plans
+
+
+def rebuild_rollups(session: Session, args):
+    rollups.rebuild(session, args.user_id)
+    print("category_month_totals rebuilt.")
+
+
+def verify_rollups(session: Session, args):
+    mismatches = rollups.verify(session, args.user_id)
+    for line in mismatches: print(line)
+    print(f"{len(mismatches)} mismatching rollup row(s).")
+    return 1 if mismatches else 0
+
+
+def migrate_indexes(session: Session, args):
+    engine = session.get_bind()
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name): continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing: continue
+            print(f"Creating index {index.name} on {table.name}.")
+            index.create(engine)
+
+
+def explain_queries(session: Session, args):
+    results = check_query_plans(session, args.user_id or uuid4(), uuid4(), uuid4())
+    for name, uses_index, plan in results:
+        print(f"{'ok  ' if uses_index else 'SCAN'} {name}: {plan}")
+    return 0 if all(uses_index for _, uses_index, _ in results) else 1
+
+
+def backfill_fingerprints(session: Session, args):
+    print(f"Fingerprinted {importer.backfill_fingerprints(session, args.user_id)} row(s).")
+
+
+def migrate(session: Session, args):
+    try:
+        applied = migrations.migrate(DATABASE_URL_STR, args.baseline)
+    except migrations.SchemaVersionError as e:
+        print(e)
+        return 1
+    print(f"Applied migration(s) {', '.join(map(str, applied))}." if applied else "No migrations to apply.")
+    print(f"Schema is at version {migrations.SCHEMA_VERSION}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tri-Sphere Budget maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, handler, help_text in [("rebuild-rollups", rebuild_rollups, "Recompute category_month_totals from transactions."),
+                                     ("verify-rollups", verify_rollups, "Check category_month_totals against transactions."),
+                                     ("migrate-indexes", migrate_indexes, "Create indexes missing from an existing database."),
+                                     ("explain-queries", explain_queries, "Fail if a hot endpoint query is not served by an index."),
+                                     ("backfill-fingerprints", backfill_fingerprints, "Fingerprint rows imported before duplicate detection or before migration 008.")]:
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--user-id", type=UUID, default=None, help="Limit the command to a single user.")
+        command.set_defaults(handler=handler)
+    command = commands.add_parser("migrate", help="Create the database or apply pending migrations, then record the schema version.")
+    command.add_argument("--baseline", type=int, default=None,
+                         help="For a database from before schema_version: the last migration already applied to it.")
+    command.set_defaults(handler=migrate)
+    args = parser.parse_args(argv)
+    with Session(create_engine(DATABASE_URL_STR)) as session:
+        return args.handler(session, args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
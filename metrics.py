@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from db import env_flag
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = env_flag("METRICS_ENABLED", True)
+# Requests issuing more statements than this are counted and logged as likely N+1 query patterns.
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "20"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class RequestStats:
+    __slots__ = ("db_seconds", "statements", "orm_rows", "statement_counts")
+
+    def __init__(self):
+        self.db_seconds, self.statements, self.orm_rows = 0.0, 0, 0
+        self.statement_counts: Counter = Counter()
+
+
+# Set for the duration of a request. Handlers' DB work runs either in the same context (greenlets under
+# AsyncSession) or in a threadpool copy of it (ThreadedSession), and both see the same RequestStats object.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    # Per-process Prometheus histogram keyed by a tuple of label values; with several workers each one reports its own.
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name, self.documentation, self.label_names, self.buckets = name, documentation, tuple(label_names), tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                label_text = _label_text(self.label_names, labels)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+                lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+                lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines)
+
+
+class CounterMetric:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name, self.documentation, self.label_names = name, documentation, tuple(label_names)
+        self._values: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...]):
+        with self._lock: self._values[labels] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_label_text(self.label_names, labels)}}} {value}")
+        return "\n".join(lines)
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Wall time per request.", ("method", "route", "status"), LATENCY_BUCKETS)
+DB_SECONDS = Histogram("http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"), LATENCY_BUCKETS)
+STATEMENTS = Histogram("http_request_db_statements", "SQL statements executed per request.", ("method", "route"), COUNT_BUCKETS)
+ORM_ROWS = Histogram("http_request_orm_rows", "ORM instances loaded per request.", ("method", "route"), ROW_BUCKETS)
+RESPONSE_BYTES = Histogram("http_response_size_bytes", "Response body size per request.", ("method", "route"), SIZE_BUCKETS)
+N_PLUS_ONE = CounterMetric("http_request_n_plus_one_total", "Requests that executed more than N_PLUS_ONE_THRESHOLD statements.",
+                           ("method", "route"))
+ALL_METRICS = (REQUEST_SECONDS, DB_SECONDS, STATEMENTS, ORM_ROWS, RESPONSE_BYTES, N_PLUS_ONE)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context: after_cursor_execute doesn't fire when the statement raises.
+    if _current.get() is not None and context is not None: context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats, started = _current.get(), getattr(context, "_metrics_start", None)
+    if stats is None or started is None: return
+    stats.db_seconds += time.perf_counter() - started
+    stats.statements += 1
+    stats.statement_counts[statement] += 1
+
+
+@event.listens_for(SQLModel, "load", propagate=True)
+def _on_load(target, context):
+    stats = _current.get()
+    if stats is not None: stats.orm_rows += 1
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in ALL_METRICS) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording wall time, DB time, statement count, ORM rows and response size per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+        stats, start, response = RequestStats(), time.perf_counter(), {"status": 500, "bytes": 0}
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start": response["status"] = message["status"]
+            elif message["type"] == "http.response.body": response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            # The router stores the matched route in the scope; label by its template to keep cardinality bounded.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route)
+            REQUEST_SECONDS.observe(labels + (str(response["status"]),), time.perf_counter() - start)
+            DB_SECONDS.observe(labels, stats.db_seconds)
+            STATEMENTS.observe(labels, stats.statements)
+            ORM_ROWS.observe(labels, stats.orm_rows)
+            RESPONSE_BYTES.observe(labels, response["bytes"])
+            if stats.statements > N_PLUS_ONE_THRESHOLD:
+                N_PLUS_ONE.inc(labels)
+                statement, count = stats.statement_counts.most_common(1)[0]
+                logger.warning("Possible N+1 on %s %s: %d statements, most repeated (%dx): %s", *labels, stats.statements, count,
+                               " ".join(statement.split())[:200])
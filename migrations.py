@@ -0,0 +1,122 @@
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, insert, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import SQLModel, create_engine, select
+
+from db import DB_ECHO, env_flag
+from models import SchemaVersion, User
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "database" / "migrations"
+# With FAST_START workers only check the schema version on boot (one query, no DDL or reflection); creating and
+# migrating the database is then `python manage.py migrate`, run once per deploy.
+FAST_START = env_flag("FAST_START", False)
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def migration_files() -> List[Tuple[int, Path]]:
+    return sorted((int(path.name.split("_", 1)[0]), path) for path in MIGRATIONS_DIR.glob("[0-9][0-9][0-9]_*.sql"))
+
+
+SCHEMA_VERSION = max((number for number, _ in migration_files()), default=0)
+
+
+def create_database(url_str: str):
+    # SQLite creates its file on first connect; only a MySQL server needs the database created up front.
+    db_url = make_url(url_str)
+    if db_url.get_backend_name() != "mysql": return
+    engine = create_engine(db_url.set(database=None))
+    try:
+        with engine.connect() as connection:
+            name = connection.dialect.identifier_preparer.quote_identifier(db_url.database)
+            connection.execute(text(f"CREATE DATABASE IF NOT EXISTS {name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
+    finally:
+        engine.dispose()
+
+
+def current_version(connection: Connection) -> Optional[int]:
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar()
+
+
+def _record_version(connection: Connection, version: int):
+    connection.execute(insert(SchemaVersion.__table__).values(version=version, applied_at=datetime.utcnow()))
+
+
+def check_schema(engine: Engine):
+    try:
+        with engine.connect() as connection: version = current_version(connection)
+    except DBAPIError as e:
+        raise SchemaVersionError(f"Could not read the schema version ({e.orig}); run `python manage.py migrate`.") from e
+    # A newer schema is fine: migrations stay compatible with the previous release during a rolling deploy.
+    if version is None or version < SCHEMA_VERSION:
+        raise SchemaVersionError(f"Database schema is at version {version}, this release needs {SCHEMA_VERSION}; "
+                                 "run `python manage.py migrate`.")
+
+
+def bootstrap(url_str: str):
+    """Create the database and any missing tables, as every worker did on boot before FAST_START existed."""
+    create_database(url_str)
+    engine = create_engine(url_str, echo=DB_ECHO)
+    try:
+        fresh = not inspect(engine).has_table(User.__tablename__)
+        SQLModel.metadata.create_all(engine)
+        # create_all only adds missing tables, so it brings an empty database to the latest version but not an old one.
+        if fresh:
+            with engine.begin() as connection: _record_version(connection, SCHEMA_VERSION)
+    finally:
+        engine.dispose()
+
+
+def _statements(sql: str) -> List[str]:
+    # Migration files are plain MySQL scripts: drop comment lines and USE (the target is the configured database),
+    # then split on the semicolons that end each statement.
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    statements = (statement.strip() for statement in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE))
+    return [statement for statement in statements if statement and not statement.upper().startswith("USE ")]
+
+
+def migrate(url_str: str, baseline: Optional[int] = None) -> List[int]:
+    """Bring the database to SCHEMA_VERSION and return the migration numbers applied.
+
+    An empty database gets every table from the models. An existing one gets the database/migrations files newer
+    than its recorded version; a database from before schema_version needs `baseline`, the last file already applied.
+    """
+    create_database(url_str)
+    engine = create_engine(url_str, echo=DB_ECHO)
+    try:
+        fresh = not inspect(engine).has_table(User.__tablename__)
+        SchemaVersion.__table__.create(engine, checkfirst=True)
+        with engine.begin() as connection:
+            version = current_version(connection)
+            if fresh:
+                SQLModel.metadata.create_all(connection)
+                _record_version(connection, SCHEMA_VERSION)
+                return []
+            if version is None:
+                if baseline is None:
+                    raise SchemaVersionError("The database has no recorded schema version; rerun with --baseline set to the "
+                                             "last database/migrations file already applied to it.")
+                _record_version(connection, baseline)
+                version = baseline
+        applied = []
+        for number, path in migration_files():
+            if number <= version: continue
+            if engine.dialect.name != "mysql":
+                raise SchemaVersionError(f"{path.name} is a MySQL script; recreate this {engine.dialect.name} database instead.")
+            # MySQL commits DDL implicitly, so a failed file is not rolled back; fix it and rerun from that file.
+            with engine.begin() as connection:
+                for statement in _statements(path.read_text()): connection.exec_driver_sql(statement)
+                _record_version(connection, number)
+            applied.append(number)
+        SQLModel.metadata.create_all(engine)
+        return applied
+    finally:
+        engine.dispose()
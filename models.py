@@ -1,21 +1,48 @@
 import enum
-from uuid import UUID, uuid4
-from typing import Optional, List
+import os
+import threading
+import time
+from decimal import Decimal
+from uuid import UUID
+from typing import Annotated, Any, Dict, Optional, List
+from pydantic import PlainSerializer
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, ForeignKey, text, Enum as SAEnum
-from sqlalchemy.dialects.mysql import BINARY
-from sqlalchemy.types import TypeDecorator, CHAR
+from sqlalchemy import BINARY, JSON, Column, ForeignKey, Index, text, Enum as SAEnum
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime, date
 
 class UUIDBinary(TypeDecorator):
-    impl = CHAR(32)
+    # The UUID's 16 bytes in their canonical big-endian order, so uuid7 ids sort by creation time in the index.
+    impl = BINARY(16)
     cache_ok = True
-    def load_dialect_impl(self, dialect):
-        return dialect.type_descriptor(BINARY(16))
     def process_bind_param(self, value: UUID, dialect):
         return value.bytes if value else None
     def process_result_value(self, value, dialect):
-        return UUID(bytes=value) if value else None
+        return UUID(bytes=bytes(value)) if value else None
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = [0, 0]  # milliseconds and counter of the previous id
+
+def uuid7() -> UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, a 12-bit counter, then 62 random bits.
+
+    New primary keys land at the right-hand edge of the clustered index instead of on random pages. Ids from
+    one process are strictly increasing; the counter starts at a random value in each millisecond and borrows
+    the next millisecond if it overflows. Older uuid4 ids remain valid alongside them.
+    """
+    random_bits = int.from_bytes(os.urandom(10), "big")
+    with _uuid7_lock:
+        ms, counter = time.time_ns() // 1_000_000, (random_bits >> 62) & 0x7FF
+        if ms <= _uuid7_last[0]:
+            ms, counter = _uuid7_last[0], _uuid7_last[1] + 1
+            if counter > 0xFFF: ms, counter = ms + 1, 0
+        _uuid7_last[:] = ms, counter
+    return UUID(int=(ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | counter << 64 | 0x2 << 62 | random_bits & 0x3FFFFFFFFFFFFFFF)
+
+# Money is DECIMAL in the database and Decimal in Python, so sums are exact; it only becomes a JSON number
+# when a response is rendered.
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+ZERO = Decimal("0.00")
 
 class CategoryType(str, enum.Enum):
     CASH = "Cash"
@@ -35,8 +62,10 @@ class UserBase(SQLModel):
 
 class User(UserBase, table=True):
     __tablename__ = "users"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     hashed_password: str
+    # Part of every issued JWT; incrementing it revokes all outstanding access and refresh tokens.
+    token_version: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": text("CURRENT_TIMESTAMP"), "server_default": text("CURRENT_TIMESTAMP")})
     accounts: List["Account"] = Relationship(back_populates="user")
@@ -57,13 +86,20 @@ class Token(SQLModel):
     expires_in: int
     refresh_token: str
 
+class RefreshRequest(SQLModel):
+    refresh_token: str
+
+class PasswordChange(SQLModel):
+    current_password: str
+    new_password: str
+
 class Account(SQLModel, table=True):
     __tablename__ = "accounts"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id")))
     name: str
     type: AccountType = Field(sa_column=Column(SAEnum(AccountType)))
-    initial_balance: float = Field(default=0.00)
+    initial_balance: Money = Field(default=ZERO, max_digits=10, decimal_places=2)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
     user: User = Relationship(back_populates="accounts")
     transactions: List["Transaction"] = Relationship(back_populates="account")
@@ -71,11 +107,11 @@ class Account(SQLModel, table=True):
 class CategoryBase(SQLModel):
     name: str
     type: CategoryType = Field(sa_column=Column(SAEnum(CategoryType, values_callable=lambda obj: [e.value for e in obj])))
-    budgeted_amount: float = Field(default=0.00)
+    budgeted_amount: Money = Field(default=ZERO, max_digits=10, decimal_places=2)
 
 class Category(CategoryBase, table=True):
     __tablename__ = "categories"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id")))
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
     user: "User" = Relationship(back_populates="categories")
@@ -86,19 +122,20 @@ class CategoryCreate(CategoryBase): pass
 class CategoryUpdate(SQLModel):
     name: Optional[str] = None
     type: Optional[CategoryType] = None
-    budgeted_amount: Optional[float] = None
+    budgeted_amount: Optional[Money] = Field(default=None, max_digits=10, decimal_places=2)
 class CategoryPublic(CategoryBase):
     id: UUID
     created_at: datetime
 
 class MonthlyBudget(SQLModel, table=True):
     __tablename__ = "monthly_budgets"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    __table_args__ = (Index("uniq_monthly_budget", "user_id", "category_id", "year", "month", unique=True),)
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id")))
     category_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("categories.id")))
     year: int
     month: int
-    budgeted_amount: float
+    budgeted_amount: Money = Field(max_digits=10, decimal_places=2)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": text("CURRENT_TIMESTAMP"), "server_default": text("CURRENT_TIMESTAMP")})
     user: User = Relationship(back_populates="monthly_budgets")
@@ -106,13 +143,19 @@ class MonthlyBudget(SQLModel, table=True):
 
 class Transaction(SQLModel, table=True):
     __tablename__ = "transactions"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    # InnoDB appends the primary key to every secondary index, so the first index also serves (date, id) ordering.
+    __table_args__ = (Index("ix_transactions_user_account_date", "user_id", "account_id", "transaction_date"),
+                      Index("ix_transactions_user_category", "user_id", "category_id"),
+                      Index("ix_transactions_user_fingerprint", "user_id", "fingerprint"))
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id")))
     account_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("accounts.id")))
     category_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("categories.id")))
-    amount: float
+    amount: Money = Field(max_digits=10, decimal_places=2)
     description: Optional[str] = None
     transaction_date: date
+    # importer.fingerprint of the statement line this was finalized from; kept as-is when the transaction is edited.
+    fingerprint: Optional[str] = Field(default=None, max_length=32)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
     user: User = Relationship(back_populates="transactions")
     account: Account = Relationship(back_populates="transactions")
@@ -121,14 +164,14 @@ class Transaction(SQLModel, table=True):
 class TransactionCreate(SQLModel):
     account_id: UUID
     category_id: UUID
-    amount: float
+    amount: Money = Field(max_digits=10, decimal_places=2)
     description: Optional[str] = None
     transaction_date: date
 
 class TransactionUpdate(SQLModel):
     account_id: Optional[UUID] = None
     category_id: Optional[UUID] = None
-    amount: Optional[float] = None
+    amount: Optional[Money] = Field(default=None, max_digits=10, decimal_places=2)
     description: Optional[str] = None
     transaction_date: Optional[date] = None
 
@@ -136,14 +179,23 @@ class TransactionPublic(TransactionCreate):
     id: UUID
     created_at: datetime
 
+class TransactionPage(SQLModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
 
 class PendingTransaction(SQLModel, table=True):
     __tablename__ = "pending_transactions"
-    id: UUID = Field(default_factory=uuid4, sa_column=Column(UUIDBinary, primary_key=True))
+    __table_args__ = (Index("ix_pending_user_account_type_date", "user_id", "target_account_type", "transaction_date"),
+                      Index("ix_pending_user_fingerprint", "user_id", "fingerprint"))
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
     user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id")))
     statement_description: str
     transaction_date: date
-    amount: float
+    amount: Money = Field(max_digits=10, decimal_places=2)
+    fingerprint: Optional[str] = Field(default=None, max_length=32)
+    # Set when an upload with on_duplicate=flag finds the same fingerprint already pending or finalized.
+    possible_duplicate: bool = Field(default=False)
     # NEW: Field to store the target account type
     target_account_type: AccountType = Field(sa_column=Column(SAEnum(AccountType)))
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
@@ -155,7 +207,12 @@ class PendingTransactionPublic(SQLModel):
     id: UUID
     statement_description: str
     transaction_date: date
-    amount: float
+    amount: Money = Field(max_digits=10, decimal_places=2)
+    possible_duplicate: bool = False
+
+
+class PendingTransactionSuggestion(PendingTransactionPublic):
+    suggested_category_id: Optional[UUID] = None
 
 
 class FinalizeTransaction(SQLModel):
@@ -163,3 +220,72 @@ class FinalizeTransaction(SQLModel):
     account_id: UUID
     category_id: UUID
 
+
+class BudgetOverride(SQLModel):
+    category_id: UUID
+    budgeted_amount: Money = Field(ge=0, max_digits=10, decimal_places=2)
+
+
+class BudgetRollForward(SQLModel):
+    months: int = Field(default=1, ge=1, le=24)
+
+
+
+class CategoryMonthTotal(SQLModel, table=True):
+    __tablename__ = "category_month_totals"
+    user_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("users.id"), primary_key=True))
+    account_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("accounts.id"), primary_key=True))
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    category_id: UUID = Field(sa_column=Column(UUIDBinary, ForeignKey("categories.id"), primary_key=True))
+    total_amount: Money = Field(default=ZERO, max_digits=12, decimal_places=2)
+    # Sum of |amount|, which is what the dashboard reports as "actual" spending per category type.
+    abs_amount: Money = Field(default=ZERO, max_digits=12, decimal_places=2)
+    tx_count: int = Field(default=0)
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(SQLModel, table=True):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_user_created", "user_id", "created_at"),)
+    id: UUID = Field(default_factory=uuid7, sa_column=Column(UUIDBinary, primary_key=True))
+    # NULL for jobs started through /internal that span several users.
+    user_id: Optional[UUID] = Field(default=None, sa_column=Column(UUIDBinary, ForeignKey("users.id"), nullable=True))
+    kind: str = Field(max_length=32)
+    status: JobStatus = Field(default=JobStatus.QUEUED, sa_column=Column(SAEnum(JobStatus)))
+    progress: int = Field(default=0)
+    total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = Field(default=None, max_length=1000)
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")})
+    started_at: Optional[datetime] = None
+    # Refreshed with every progress report; a running job whose updated_at stops moving was lost with its process.
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class JobPublic(SQLModel):
+    id: UUID
+    kind: str
+    status: JobStatus
+    progress: int
+    total: Optional[int]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
+
+class SchemaVersion(SQLModel, table=True):
+    # One row per applied database/migrations file; the highest version is the schema's current one.
+    __tablename__ = "schema_version"
+    version: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
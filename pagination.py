@@ -0,0 +1,18 @@
+import base64
+from datetime import date
+from typing import Tuple
+from uuid import UUID
+
+
+# Opaque keyset cursor over (transaction_date, id), the sort key of transaction listings.
+def encode_cursor(transaction_date: date, row_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{transaction_date.isoformat()}|{row_id.hex}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_part, id_part = raw.split("|")
+        return date.fromisoformat(date_part), UUID(hex=id_part)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import Session, select
+
+from models import AccountType, CategoryMonthTotal, MonthlyBudget, PendingTransaction, Transaction
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    sql = prefix + compiler.process(element.statement, **kw)
+    # The plan has its own columns (e.g. "id", "type"); drop the inner SELECT's result map so its
+    # type processors are not applied to them.
+    compiler._result_columns = []
+    return sql
+
+
+# The WHERE shapes of the endpoint queries in main.py; keep in sync when a handler's filters change.
+def hot_queries(user_id: UUID, account_id: UUID, category_id: UUID) -> Dict[str, Tuple[str, object]]:
+    start, end = date(2024, 1, 1), date(2024, 2, 1)
+    return {
+        "transactions by month": ("transactions", select(Transaction).where(
+            Transaction.user_id == user_id, Transaction.account_id == account_id,
+            Transaction.transaction_date >= start, Transaction.transaction_date < end)),
+        "transactions all time": ("transactions", select(Transaction).where(
+            Transaction.user_id == user_id, Transaction.account_id == account_id)),
+        "category in use": ("transactions", select(Transaction.id).where(
+            Transaction.user_id == user_id, Transaction.category_id == category_id).limit(1)),
+        "pending by account type": ("pending_transactions", select(PendingTransaction).where(
+            PendingTransaction.user_id == user_id, PendingTransaction.target_account_type == AccountType.CHECKING)),
+        "monthly overrides": ("monthly_budgets", select(MonthlyBudget).where(
+            MonthlyBudget.user_id == user_id, MonthlyBudget.category_id == category_id,
+            MonthlyBudget.year == 2024, MonthlyBudget.month == 1)),
+        "import duplicates (pending)": ("pending_transactions", select(PendingTransaction.fingerprint, func.count()).where(
+            PendingTransaction.user_id == user_id, PendingTransaction.fingerprint.in_(["0" * 32, "f" * 32]))
+            .group_by(PendingTransaction.fingerprint)),
+        "import duplicates (finalized)": ("transactions", select(Transaction.fingerprint, func.count()).where(
+            Transaction.user_id == user_id, Transaction.fingerprint.in_(["0" * 32, "f" * 32])).group_by(Transaction.fingerprint)),
+        "dashboard month rollup": ("category_month_totals", select(CategoryMonthTotal).where(
+            CategoryMonthTotal.user_id == user_id, CategoryMonthTotal.account_id == account_id,
+            CategoryMonthTotal.year == 2024, CategoryMonthTotal.month == 1)),
+    }
+
+
+def _uses_index(dialect: str, table: str, plan: List) -> bool:
+    if dialect == "sqlite":
+        # "SEARCH <table> USING INDEX ..." is a lookup/range scan; "SCAN <table>" reads every row. A search on the
+        # user_id prefix of some other index alone reads all of the user's rows, which is what a dropped index looks like.
+        steps = [row[-1] for row in plan if f" {table}" in f" {row[-1]}"]
+        return bool(steps) and all(step.startswith("SEARCH") and not step.endswith("(user_id=?)") for step in steps)
+    steps = [row._mapping for row in plan if row._mapping["table"] == table]
+    return bool(steps) and all(step["type"] not in ("ALL", "index") and step["key"] for step in steps)
+
+
+def check_query_plans(session: Session, user_id: UUID, account_id: UUID, category_id: UUID) -> List[Tuple[str, bool, List]]:
+    dialect = session.get_bind().dialect.name
+    results = []
+    for name, (table, statement) in hot_queries(user_id, account_id, category_id).items():
+        plan = session.execute(Explain(statement)).all()
+        results.append((name, _uses_index(dialect, table, plan), [tuple(row) for row in plan]))
+    return results
@@ -0,0 +1,179 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+from uuid import UUID
+
+from fastapi import Depends, Request
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import create_engine
+from starlette.concurrency import run_in_threadpool
+
+import db
+from auth import CurrentUser, get_current_user
+from cache import MemoryBackend, response_cache
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replica URLs, with the same kind of driver as the primary (async when ASYNC_DATABASE_URL is set).
+# Empty means every request uses the primary.
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+# A replica may fall up to REPLICA_MAX_LAG behind between two checks before it is taken out of rotation, so reads
+# stay on the primary that long after a user's write; shorter would let them miss their own write.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", str(REPLICA_MAX_LAG + REPLICA_CHECK_INTERVAL)))
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _replication_lag(connection: Connection) -> float:
+    if connection.dialect.name != "mysql":
+        connection.exec_driver_sql("SELECT 1")
+        return 0.0
+    # Needs the REPLICATION CLIENT privilege. MySQL before 8.0.22 only knows the SLAVE spelling.
+    try:
+        row = connection.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    except DBAPIError:
+        row = connection.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+    if row is None: return 0.0  # a standalone server standing in for a replica
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return math.inf if lag is None else float(lag)  # NULL: the replication threads are stopped
+
+
+def _measure_lag_sync(engine: Engine) -> float:
+    with engine.connect() as connection: return _replication_lag(connection)
+
+
+async def _measure_lag(engine: Union[AsyncEngine, Engine]) -> float:
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as connection: return await connection.run_sync(_replication_lag)
+    return await run_in_threadpool(_measure_lag_sync, engine)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = (create_async_engine(url, **db.engine_options(url, True)) if db.ASYNC_DATABASE_URL_STR
+                       else create_engine(url, **db.engine_options(url)))
+        self.healthy, self.lag, self.error = False, None, None
+
+
+class ReplicaRouter:
+    """Sends read-only requests to healthy replicas in turn, and a user's reads to the primary just after they wrote.
+
+    Replicas are probed every REPLICA_CHECK_INTERVAL; one that is unreachable or more than REPLICA_MAX_LAG behind
+    is skipped until a later probe passes. With no healthy replica every read goes to the primary.
+    """
+
+    def __init__(self, urls: List[str] = READ_REPLICA_URLS, max_lag: float = REPLICA_MAX_LAG,
+                 check_interval: float = REPLICA_CHECK_INTERVAL, sticky_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.urls, self.max_lag, self.check_interval, self.sticky_seconds = urls, max_lag, check_interval, sticky_seconds
+        self.replicas: List[Replica] = []
+        self.stats = {"replica": 0, "primary_sticky": 0, "primary_fallback": 0}
+        self._turn = itertools.count()
+        self._local_writes: Dict[UUID, float] = {}  # user id -> monotonic time their window ends
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def _shared_writes(self):
+        # With redis every worker sees a user's recent write. The in-process backend is a size-capped LRU shared with
+        # cached responses, which could evict a live marker, so without redis the markers stay in _local_writes.
+        backend = response_cache.backend
+        return None if backend is None or isinstance(backend, MemoryBackend) else backend
+
+    async def start(self):
+        if not self.urls: return
+        self.replicas = [Replica(url) for url in self.urls]
+        await self.check()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+            now = time.monotonic()
+            for user_id in [user_id for user_id, until in self._local_writes.items() if until < now]: del self._local_writes[user_id]
+
+    async def check(self):
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica):
+        was_healthy = replica.healthy
+        try:
+            replica.lag = await asyncio.wait_for(_measure_lag(replica.engine), timeout=self.check_interval)
+            replica.error = None
+        except Exception as e:
+            replica.lag, replica.error = None, str(e) or type(e).__name__
+        replica.healthy = replica.lag is not None and replica.lag <= self.max_lag
+        if was_healthy and not replica.healthy:
+            logger.warning("Replica %s out of rotation: %s", replica.url, replica.error or f"{replica.lag}s behind")
+        elif replica.healthy and not was_healthy:
+            logger.info("Replica %s back in rotation", replica.url)
+
+    async def note_write(self, user_id: UUID):
+        if not self.replicas: return
+        shared = self._shared_writes
+        if shared is None: self._local_writes[user_id] = time.monotonic() + self.sticky_seconds
+        else: await shared.set(f"rw:{user_id}", b"1", ex=math.ceil(self.sticky_seconds))
+
+    async def _wrote_recently(self, user_id: UUID) -> bool:
+        shared = self._shared_writes
+        if shared is not None: return await shared.get(f"rw:{user_id}") is not None
+        return self._local_writes.get(user_id, 0) >= time.monotonic()
+
+    async def engine_for(self, primary: Union[AsyncEngine, Engine], user_id: UUID) -> Union[AsyncEngine, Engine]:
+        if not self.replicas: return primary
+        if await self._wrote_recently(user_id):
+            self.stats["primary_sticky"] += 1
+            return primary
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.stats["primary_fallback"] += 1
+            return primary
+        self.stats["replica"] += 1
+        return healthy[next(self._turn) % len(healthy)].engine
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [{"url": replica.url, "healthy": replica.healthy, "lag_seconds": replica.lag, "error": replica.error,
+                 "pool": db.pool_status(replica.engine)} for replica in self.replicas]
+
+    async def close(self):
+        if self._task: self._task.cancel()
+        for replica in self.replicas:
+            if isinstance(replica.engine, AsyncEngine): await replica.engine.dispose()
+            else: replica.engine.dispose()
+
+
+replica_router = ReplicaRouter()
+
+
+async def get_read_session(request: Request, user: CurrentUser = Depends(get_current_user)):
+    # For handlers that only read: a replica when one is healthy and the user has not written recently.
+    engine = await replica_router.engine_for(request.app.state.engine, user.id)
+    async with db.session_scope(engine) as session: yield session
+
+
+class ReadYourWritesMiddleware:
+    """Starts a user's read-your-writes window when a successful write request by them is answered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_router.replicas:
+            return await self.app(scope, receive, send)
+        state = scope.setdefault("state", {})  # get_current_user leaves the authenticated user's id here
+
+        async def send_wrapper(message):
+            # Before the response goes out, so a read the client sends on receiving it already sees the window.
+            if message["type"] == "http.response.start" and message["status"] < 400 and state.get("user_id"):
+                await replica_router.note_write(state["user_id"])
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
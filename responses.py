@@ -0,0 +1,27 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Result
+from sqlmodel import SQLModel
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal): return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    # orjson encodes UUID, date/datetime and Enum natively, so rows can be returned without per-row model validation.
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def public_columns(table_model: Type[SQLModel], public_model: Type[SQLModel]) -> list:
+    return [getattr(table_model, field) for field in public_model.model_fields]
+
+
+def rows_as_dicts(result: Result) -> List[Dict[str, Any]]:
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
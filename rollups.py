@@ -0,0 +1,66 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, extract, func, insert
+from sqlmodel import Session, select
+
+from dialects import upsert
+from models import CategoryMonthTotal, Transaction
+
+ROLLUP_KEY = ("user_id", "account_id", "category_id", "year", "month")
+ROLLUP_VALUES = ("total_amount", "abs_amount", "tx_count")
+
+
+class RollupEntry(NamedTuple):
+    user_id: UUID
+    account_id: UUID
+    category_id: UUID
+    transaction_date: date
+    amount: Decimal
+
+
+def snapshot(tx: Transaction) -> RollupEntry:
+    return RollupEntry(tx.user_id, tx.account_id, tx.category_id, tx.transaction_date, tx.amount)
+
+
+def record_transactions(session: Session, added: Iterable = (), removed: Iterable = ()):
+    """Apply the effect of added/removed transactions to category_month_totals in the caller's DB transaction."""
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+    for sign, txs in ((1, added), (-1, removed)):
+        for tx in txs:
+            delta = deltas[(tx.user_id, tx.account_id, tx.category_id, tx.transaction_date.year, tx.transaction_date.month)]
+            delta[0] += sign * tx.amount
+            delta[1] += sign * abs(tx.amount)
+            delta[2] += sign
+    rows = [dict(zip(ROLLUP_KEY + ROLLUP_VALUES, key + tuple(values))) for key, values in deltas.items() if any(values)]
+    if rows:
+        session.execute(upsert(session, CategoryMonthTotal.__table__, rows, ROLLUP_KEY, ROLLUP_VALUES, increment=True))
+
+
+def _source_totals(user_id: Optional[UUID] = None):
+    year, month = extract("year", Transaction.transaction_date), extract("month", Transaction.transaction_date)
+    query = select(Transaction.user_id, Transaction.account_id, Transaction.category_id, year, month,
+                   func.sum(Transaction.amount), func.sum(func.abs(Transaction.amount, type_=Transaction.amount.type)), func.count()) \
+        .group_by(Transaction.user_id, Transaction.account_id, Transaction.category_id, year, month)
+    return query.where(Transaction.user_id == user_id) if user_id else query
+
+
+def rebuild(session: Session, user_id: Optional[UUID] = None):
+    clear = delete(CategoryMonthTotal)
+    session.execute(clear.where(CategoryMonthTotal.user_id == user_id) if user_id else clear)
+    session.execute(insert(CategoryMonthTotal.__table__).from_select(ROLLUP_KEY + ROLLUP_VALUES, _source_totals(user_id)))
+    session.commit()
+
+
+def verify(session: Session, user_id: Optional[UUID] = None) -> List[str]:
+    """Compare category_month_totals with the transactions table and describe every mismatching key."""
+    expected = {tuple(row[:5]): tuple(row[5:]) for row in session.exec(_source_totals(user_id))}
+    stored_query = select(CategoryMonthTotal).where(CategoryMonthTotal.tx_count != 0)
+    if user_id: stored_query = stored_query.where(CategoryMonthTotal.user_id == user_id)
+    stored = {(r.user_id, r.account_id, r.category_id, r.year, r.month): (r.total_amount, r.abs_amount, r.tx_count)
+              for r in session.exec(stored_query)}
+    return [f"{key}: expected {expected.get(key)}, stored {stored.get(key)}"
+            for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key)]
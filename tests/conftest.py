@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# main reads its settings at import time, so the throwaway database has to be configured first.
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.sqlite")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as client: yield client
+
+
+@pytest.fixture
+def auth_headers(client):
+    from models import uuid7
+    username = f"user-{uuid7().hex[:12]}"
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+    token = client.post("/auth/token", data={"username": username, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
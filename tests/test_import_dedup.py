@@ -0,0 +1,33 @@
+STATEMENT = "Date,Description,Amount\n2024-02-01,ONLINE TRANSFER,500.00\n"
+
+
+def upload(client, headers, account_type, body=STATEMENT):
+    response = client.post("/transactions/upload", params={"account_type": account_type}, headers=headers,
+                           files={"file": ("statement.csv", body, "text/csv")})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def pending(client, headers, account_type):
+    return client.get("/transactions/pending", params={"account_type": account_type}, headers=headers).json()
+
+
+def test_same_line_imports_into_each_account(client, auth_headers):
+    assert upload(client, auth_headers, "Checking")["imported"] == 1
+    savings = upload(client, auth_headers, "Savings")
+    assert (savings["imported"], savings["duplicates"]) == (1, 0)
+    assert [row["statement_description"] for row in pending(client, auth_headers, "Savings")] == ["ONLINE TRANSFER"]
+
+
+def test_reupload_to_same_account_is_skipped(client, auth_headers):
+    upload(client, auth_headers, "Checking")
+    again = upload(client, auth_headers, "Checking")
+    assert (again["imported"], again["duplicates"]) == (0, 1)
+    assert len(pending(client, auth_headers, "Checking")) == 1
+
+
+def test_oversized_field_is_reported_as_a_line_error(client, auth_headers):
+    body = f"Date,Description,Amount\n2024-03-01,{'x' * 200_000},1.00\n2024-03-02,GROCERIES,2.00\n"
+    result = upload(client, auth_headers, "Checking", body)
+    assert (result["imported"], result["failed"]) == (1, 1)
+    assert result["errors"][0]["line"] == 2 and "field limit" in result["errors"][0]["error"]
@@ -0,0 +1,21 @@
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from query_plans import check_query_plans, hot_queries
+
+
+@pytest.fixture(scope="module")
+def plans():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield {name: (uses_index, plan) for name, uses_index, plan in check_query_plans(session, uuid4(), uuid4(), uuid4())}
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", list(hot_queries(uuid4(), uuid4(), uuid4())))
+def test_hot_query_uses_index(plans, name):
+    uses_index, plan = plans[name]
+    assert uses_index, f"{name} is not served by an index: {plan}"